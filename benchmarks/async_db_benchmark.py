@@ -0,0 +1,151 @@
+"""
+Concurrency benchmark: blocking Session vs AsyncSession inside `async def` routes.
+
+Builds a throwaway copy of the fast_dantic database, then fires many parallel requests at two
+otherwise identical endpoints that read one page of orders:
+
+    * /blocking-orders  -- the old pattern: a sync `Session` used inside an `async def` route
+    * /async-orders     -- an `AsyncSession` from `get_async_session`, awaited
+
+While the load runs, a separate client keeps hitting a trivial `/ping` route. Its latency shows how
+long the event loop is frozen by database work, which is what every other user of the API feels.
+
+Run with:
+
+    python benchmarks/async_db_benchmark.py --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi", "fast_dantic"))
+
+# database.py opens "database.db" relative to the working directory, so work in a temp folder
+# to leave the real database untouched.
+os.chdir(tempfile.mkdtemp(prefix="fast_dantic_bench_"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from crud import bulk_insert_orders, page_orders  # noqa: E402
+from database import async_engine, create_db_and_tables, engine, get_async_session  # noqa: E402
+from schemas import CustomerOrder  # noqa: E402
+
+PAGE_SIZE = 50
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+@app.get("/blocking-orders")
+async def blocking_orders():
+    with Session(engine) as session:
+        orders, _ = page_orders(session, PAGE_SIZE, None, [])
+    return len(orders)
+
+
+@app.get("/async-orders")
+async def async_orders(session: AsyncSession = Depends(get_async_session)):
+    orders, _ = await session.run_sync(page_orders, PAGE_SIZE, None, [])
+    return len(orders)
+
+
+def seed(rows: int):
+    create_db_and_tables()
+    orders = [
+        CustomerOrder(
+            order_id=i,
+            customer_name=f"Customer {i}",
+            email=f"customer{i}@example.com",
+            price=10 + i % 90,
+            items=[{"item_name": "Agent", "sku": "CS-001", "quantity": 1 + i % 3}] * 3,
+        )
+        for i in range(rows)
+    ]
+    with Session(engine) as session:
+        bulk_insert_orders(session, orders)
+        session.commit()
+
+
+def start_server() -> str:
+    """Runs the app with uvicorn in a background thread, so the server has its own event loop."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def run_load(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> float:
+    """Sends `total` requests to `path`, `concurrency` at a time. Returns requests per second."""
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+async def probe_ping(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    """Measures /ping latency (ms) over and over until `stop` is set."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/ping")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def benchmark(base_url: str, path: str, total: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        await run_load(client, path, min(total, 50), concurrency)  # warm up connections and caches
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_ping(client, stop))
+        throughput = await run_load(client, path, total, concurrency)
+        stop.set()
+        pings = await probe
+
+    quantiles = statistics.quantiles(pings, n=100) if len(pings) > 1 else [pings[0]] * 99
+    return {"req_per_sec": throughput, "pings": len(pings), "ping_p50_ms": quantiles[49], "ping_p99_ms": quantiles[98]}
+
+
+async def main(args):
+    seed(args.rows)
+    base_url = start_server()
+    print(f"{args.rows:,} orders seeded; {args.requests:,} requests per endpoint at concurrency {args.concurrency}\n")
+    print(f"{'endpoint':<18} {'req/s':>10} {'pings':>8} {'/ping p50':>12} {'/ping p99':>12}")
+    for path in ["/blocking-orders", "/async-orders"]:
+        result = await benchmark(base_url, path, args.requests, args.concurrency)
+        print(f"{path:<18} {result['req_per_sec']:>10,.0f} {result['pings']:>8} {result['ping_p50_ms']:>10.1f}ms {result['ping_p99_ms']:>10.1f}ms")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000, help="Orders to seed the database with")
+    parser.add_argument("--requests", type=int, default=1_000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    asyncio.run(main(parser.parse_args()))
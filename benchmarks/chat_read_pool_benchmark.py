@@ -0,0 +1,113 @@
+"""
+Concurrent `GET /chat/` latency for the chat app example, with one SQLite connection vs. the WAL reader pool.
+
+It fills a fresh database with `--conversations` chats of `--turns` turns each, then sends `--requests`
+`GET /chat/` requests for random conversations, `--concurrency` at a time, while a background writer keeps
+appending new turns (one commit each), like other users chatting. Only `--cached` conversations fit in the
+in-memory history cache, so most requests really read and decode their history from the database.
+
+    * single  -- `Database.connect(readers=0)`: every read and write queues on one connection/thread (the old behaviour)
+    * pool    -- `Database.connect(readers=N)`: reads are spread over N read-only connections, writes keep their own
+
+Run with:
+
+    python benchmarks/chat_read_pool_benchmark.py --conversations 200 --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "examples"))
+
+os.environ.setdefault("OPENAI_API_KEY", "not-needed-no-model-is-called")
+os.environ.setdefault("LOGFIRE_SEND_TO_LOGFIRE", "false")
+os.environ.setdefault("LOGFIRE_CONSOLE", "false")  # one line per SQL query would swamp the results
+
+import httpx  # noqa: E402
+from pydantic_ai import ModelMessagesTypeAdapter, ModelRequest, ModelResponse, TextPart, UserPromptPart  # noqa: E402
+
+import chat_app  # noqa: E402
+
+
+def turn_json(n: int) -> bytes:
+    """One stored row: a user prompt and the model's answer, about 1 KB of text."""
+    return ModelMessagesTypeAdapter.dump_json([
+        ModelRequest(parts=[UserPromptPart(f"Question {n}: " + "tell me more about routers " * 10)]),
+        ModelResponse(parts=[TextPart(f"Answer {n}: " + "routers forward packets between networks. " * 20)]),
+    ])
+
+
+async def fill(db: "chat_app.Database", conversations: int, turns: int):
+    for c in range(conversations):
+        for t in range(turns):
+            await db.add_messages(f"conv-{c}", turn_json(t))
+
+
+async def run_mode(path: Path, readers: int, args) -> tuple[float, list[float], int]:
+    chat_app.MAX_CACHED_CONVERSATIONS = args.cached
+    rng = random.Random(0)
+    targets = [f"conv-{rng.randrange(args.conversations)}" for _ in range(args.requests)]
+    latencies: list[float] = []
+    writes = 0
+
+    async with chat_app.Database.connect(path, readers=readers) as db:
+        chat_app.app.dependency_overrides[chat_app.get_db] = lambda: db
+        stop = asyncio.Event()
+
+        async def writer():
+            nonlocal writes
+            while not stop.is_set():
+                await db.add_messages(f"conv-{rng.randrange(args.conversations)}", turn_json(writes))
+                writes += 1
+
+        transport = httpx.ASGITransport(app=chat_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+            remaining = iter(targets)
+
+            async def worker():
+                for conversation_id in remaining:
+                    start = time.perf_counter()
+                    response = await client.get("/chat/", cookies={"conversation_id": conversation_id})
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            writing = asyncio.create_task(writer())
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await writing
+    chat_app.app.dependency_overrides.clear()
+    return elapsed, latencies, writes
+
+
+async def main_async(args):
+    path = Path(tempfile.mkdtemp(prefix="chat_app_pool_")) / "chat.sqlite"
+    async with chat_app.Database.connect(path, readers=0) as db:
+        await fill(db, args.conversations, args.turns)
+
+    print(f"{args.conversations} conversations x {args.turns} turns, {args.requests} GET /chat/ at concurrency {args.concurrency}, "
+          f"{args.cached} conversations cached, one writer running alongside\n")
+    print(f"{'mode':<10} {'req/s':>8} {'p50':>10} {'p99':>10} {'writes':>8}")
+    for mode, readers in [("single", 0), ("pool", args.readers)]:
+        elapsed, latencies, writes = await run_mode(path, readers, args)
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"{mode:<10} {len(latencies) / elapsed:>8.0f} {quantiles[49]:>8.1f}ms {quantiles[98]:>8.1f}ms {writes:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200, help="Conversations in the database")
+    parser.add_argument("--turns", type=int, default=20, help="Turns stored per conversation")
+    parser.add_argument("--requests", type=int, default=2000, help="Total GET /chat/ requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once")
+    parser.add_argument("--readers", type=int, default=4, help="Reader connections in pool mode")
+    parser.add_argument("--cached", type=int, default=20, help="Conversations the in-memory history cache holds")
+    asyncio.run(main_async(parser.parse_args()))
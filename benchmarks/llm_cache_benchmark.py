@@ -0,0 +1,117 @@
+"""
+LLM response cache benchmark for `/extract-order`, run against a local fake model (no OpenAI key or network needed).
+
+The fake model (a Pydantic AI `FunctionModel`) waits `--latency` seconds, like a real LLM round-trip,
+then returns a fixed order. The benchmark counts how many times it is actually called while
+`--requests` checkouts hit the endpoint, `--concurrency` at a time, using only `--distinct` different
+texts (sent with random extra whitespace, like real retried or re-typed requests):
+
+    * uncached  -- every request calls `order_agent.run()` (the old behaviour)
+    * cached    -- requests go through `run_cached` (response cache + single-flight coalescing)
+
+Run with:
+
+    python benchmarks/llm_cache_benchmark.py --requests 500 --distinct 20 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi", "fast_dantic"))
+
+# main.py opens "database.db" relative to the working directory, so work in a temp folder
+# to leave the real database untouched.
+os.chdir(tempfile.mkdtemp(prefix="fast_dantic_llm_"))
+os.environ.setdefault("OPENAI_API_KEY", "not-needed-for-the-fake-model")
+os.environ.setdefault("LOGFIRE_SEND_TO_LOGFIRE", "false")
+os.environ.setdefault("LOGFIRE_CONSOLE", "false")
+
+import httpx  # noqa: E402
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart  # noqa: E402
+from pydantic_ai.models.function import AgentInfo, FunctionModel  # noqa: E402
+
+import main  # noqa: E402
+from llm_cache import llm_response_cache  # noqa: E402
+
+FAKE_ORDER = {
+    "order_id": 1,
+    "customer_name": "Guest User",
+    "email": "guest@example.com",
+    "price": 1198.0,
+    "items": [{"item_name": "Customer Support Bot", "sku": "CS-001", "quantity": 2}],
+}
+
+
+def fake_model(latency: float) -> tuple[FunctionModel, list]:
+    calls = []
+
+    async def respond(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        calls.append(1)
+        await asyncio.sleep(latency)
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, FAKE_ORDER)])
+
+    return FunctionModel(respond, model_name="fake-extractor"), calls
+
+
+async def uncached_extract(order_text: str = main.Body(..., embed=True)):
+    result = await main.order_agent.run(order_text)
+    return result.output
+
+
+def texts(requests: int, distinct: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    base = [f"I need {n} Customer Support Bots for my team" for n in range(1, distinct + 1)]
+    # Same request, different spacing: the cache normalizes these to one key
+    return [rng.choice(base).replace(" ", " " * rng.randint(1, 3)) + " " * rng.randint(0, 2) for _ in range(requests)]
+
+
+async def run_load(path: str, bodies: list[str], concurrency: int) -> tuple[float, list[float]]:
+    remaining = iter(bodies)
+    latencies = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        async def worker():
+            for text in remaining:
+                start = time.perf_counter()
+                response = await client.post(path, json={"order_text": text})
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+async def main_async(args):
+    model, calls = fake_model(args.latency)
+    main.order_agent.model = model
+    main.app.post("/extract-order-uncached")(uncached_extract)
+    bodies = texts(args.requests, args.distinct)
+
+    print(f"{args.requests} requests, {args.distinct} distinct texts, concurrency {args.concurrency}, fake LLM latency {args.latency * 1000:.0f}ms\n")
+    print(f"{'mode':<10} {'LLM calls':>10} {'seconds':>9} {'p50':>10} {'p99':>10}")
+    # ASGITransport doesn't send lifespan events, so run the app's startup ourselves: it creates the
+    # tables, seeds the products and loads the catalog the agent's system prompt is built from
+    async with main.lifespan(main.app):
+        for mode, path in [("uncached", "/extract-order-uncached"), ("cached", "/extract-order")]:
+            calls.clear()
+            llm_response_cache.clear()
+            elapsed, latencies = await run_load(path, bodies, args.concurrency)
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(f"{mode:<10} {len(calls):>10} {elapsed:>9.2f} {quantiles[49]:>8.1f}ms {quantiles[98]:>8.1f}ms")
+    print(f"\ncache: {llm_response_cache.hits} hits, {llm_response_cache.coalesced} coalesced, {llm_response_cache.misses} misses")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Total /extract-order requests")
+    parser.add_argument("--distinct", type=int, default=20, help="How many different order texts there are")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds the fake LLM takes per call")
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,251 @@
+"""
+Benchmark suite for the two `CustomerOrder` schemas:
+
+    * data_cleaner/validate_orders.py    (flat order)
+    * fastapi/fast_dantic/schemas.py     (order with a nested list of `OrderItemSchema`)
+
+For every schema, synthetic dataset and operation it measures throughput (rows/sec),
+per-row latency (p50 / p99) and peak memory allocated. Results are saved to
+`benchmarks/results/<git commit>.json` and compared with the previous run, so a
+regression shows up as soon as a commit introduces it.
+
+Run with:
+
+    python benchmarks/schema_benchmarks.py --rows 20000
+    python benchmarks/schema_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from pydantic import BaseModel, ValidationError
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Both projects use flat, script-style imports (`from schemas import ...`), so we put their folders on the path
+sys.path[:0] = [os.path.join(ROOT_DIR, "data_cleaner"), os.path.join(ROOT_DIR, "fastapi", "fast_dantic")]
+
+from dummy_data import fake_products_db  # noqa: E402
+from schemas import CustomerOrder as ApiCustomerOrder  # noqa: E402
+from validate_orders import CustomerOrder as CleanerCustomerOrder  # noqa: E402
+
+
+# ==========================================
+# Synthetic Order Generators
+# ==========================================
+# A fixed seed means every run (and every commit) benchmarks exactly the same data.
+
+def _items(rng: random.Random, count: int) -> list[dict]:
+    items = []
+    for _ in range(count):
+        product = rng.choice(fake_products_db)
+        items.append({
+            "product_id": rng.randint(1, len(fake_products_db)),
+            "item_name": product["item_name"],
+            "sku": product["sku"],
+            "quantity": rng.randint(1, 5),
+            "price": product["price"],
+            "image_url": product["image_url"],
+        })
+    return items
+
+
+def valid_rows(rows: int, items: int, seed: int = 0) -> list[dict]:
+    """Perfectly clean orders; `items` is the number of nested line items per order (0 = none)."""
+    rng = random.Random(seed)
+    orders = []
+    for i in range(rows):
+        order = {
+            "order_id": i,
+            "customer_name": f"Customer {i}",
+            "email": f"customer{i}@example.com",
+            "price": round(rng.uniform(1, 5000), 2),
+            "is_priority": rng.random() < 0.1,
+        }
+        if items:
+            order["items"] = _items(rng, items)
+        orders.append(order)
+    return orders
+
+
+def dirty_rows(rows: int, items: int, seed: int = 0) -> list[dict]:
+    """Valid orders whose numbers arrive as strings, so Pydantic has to coerce them."""
+    orders = valid_rows(rows, items, seed)
+    for order in orders:
+        order["order_id"] = str(order["order_id"])
+        order["price"] = str(order["price"])
+        order["is_priority"] = "yes" if order["is_priority"] else "no"
+        for item in order.get("items", []):
+            item["quantity"] = str(item["quantity"])
+    return orders
+
+
+def bad_email_rows(rows: int, items: int, seed: int = 0) -> list[dict]:
+    """Every order fails on its email, so this measures the cost of raising ValidationError."""
+    orders = valid_rows(rows, items, seed)
+    for order in orders:
+        order["email"] = order["email"].replace(".com", "")
+    return orders
+
+
+DATASETS = {
+    "valid": valid_rows,
+    "dirty": dirty_rows,
+    "bad_email": bad_email_rows,
+}
+
+# (schema name, model, line-item counts to try). The data_cleaner model has no `items` field.
+SCHEMAS = [
+    ("data_cleaner", CleanerCustomerOrder, [0]),
+    ("fast_dantic", ApiCustomerOrder, [1, 10, 50]),
+]
+
+
+# ==========================================
+# Measurement
+# ==========================================
+def _validate(model: type[BaseModel]) -> Callable:
+    def run(row):
+        try:
+            model.model_validate(row)
+        except ValidationError:
+            pass
+    return run
+
+
+def _validate_json(model: type[BaseModel]) -> Callable:
+    def run(row):
+        try:
+            model.model_validate_json(row)
+        except ValidationError:
+            pass
+    return run
+
+
+def _dump_json(model: type[BaseModel]) -> Callable:
+    return lambda row: row.model_dump_json()
+
+
+def measure(func: Callable, inputs: list) -> dict:
+    """Times `func` on every input, then re-runs it under tracemalloc for the allocation figure."""
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for row in inputs:
+        row_start = clock()
+        func(row)
+        latencies.append(clock() - row_start)
+    total_seconds = (clock() - start) / 1e9
+
+    # tracemalloc slows everything down, so memory is measured in a separate pass
+    tracemalloc.start()
+    for row in inputs:
+        func(row)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rows_per_sec": round(len(inputs) / total_seconds),
+        "p50_us": round(quantiles[49] / 1000, 2),
+        "p99_us": round(quantiles[98] / 1000, 2),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(rows: int) -> dict:
+    results = {}
+    for schema_name, model, item_counts in SCHEMAS:
+        for items in item_counts:
+            for dataset_name, generate in DATASETS.items():
+                data = generate(rows, items)
+                json_data = [json.dumps(row).encode() for row in data]
+                cases = [("model_validate", _validate(model), data), ("model_validate_json", _validate_json(model), json_data)]
+                if dataset_name != "bad_email":
+                    # Serialization only makes sense for orders that validated
+                    models = [model.model_validate(row) for row in data]
+                    cases.append(("model_dump_json", _dump_json(model), models))
+
+                for operation, func, inputs in cases:
+                    key = f"{schema_name}[items={items}]/{dataset_name}/{operation}"
+                    results[key] = measure(func, inputs)
+                    print(f"{key:<58} {results[key]['rows_per_sec']:>10,} rows/s  p99 {results[key]['p99_us']:>8} µs  {results[key]['peak_alloc_kb']:>9} KB")
+    return results
+
+
+# ==========================================
+# Saving & Comparing Results
+# ==========================================
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "uncommitted"
+
+
+def latest_result() -> Optional[str]:
+    """The most recently saved result file, if any."""
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    paths = [os.path.join(RESULTS_DIR, name) for name in os.listdir(RESULTS_DIR) if name.endswith(".json")]
+    return max(paths, key=os.path.getmtime, default=None)
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Prints every case whose throughput dropped by more than `threshold` (e.g. 0.1 = 10%)."""
+    print(f"\nCompared with {baseline['commit']} ({baseline['timestamp']}):")
+    regressions = 0
+    for key, now in current["results"].items():
+        before = baseline["results"].get(key)
+        if not before:
+            continue
+        change = now["rows_per_sec"] / before["rows_per_sec"] - 1
+        if change < -threshold:
+            regressions += 1
+            print(f"  ⚠️  {key}: {change:+.1%} rows/s ({before['rows_per_sec']:,} -> {now['rows_per_sec']:,})")
+    if not regressions:
+        print(f"  ✅ No case slowed down by more than {threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000, help="Orders per dataset")
+    parser.add_argument("--compare", help="Result file to compare against (default: the previous run)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slow-down that counts as a regression")
+    args = parser.parse_args()
+
+    # Load the baseline first: re-running on the same commit overwrites that commit's file
+    baseline = None
+    baseline_path = args.compare or latest_result()
+    if baseline_path:
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+
+    commit = current_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "rows": args.rows,
+        "results": run_suite(args.rows),
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_path = os.path.join(RESULTS_DIR, f"{commit}.json")
+    with open(output_path, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nSaved results to {output_path}")
+
+    if baseline:
+        compare(baseline, report, args.threshold)
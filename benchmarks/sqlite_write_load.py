@@ -0,0 +1,120 @@
+"""
+Load test: concurrent checkout writes against each SQLite performance profile.
+
+For every profile in `database.PROFILES` ("safe" = SQLite's defaults, "performance" = WAL + tuned
+PRAGMAs + a bigger pool) it creates a fresh database, then runs many threads that each perform
+`/clean-order`-style checkouts (insert an Order, insert its items, commit) while other threads keep
+reading pages of orders. It reports write throughput, commit latency and "database is locked" failures.
+
+Run with:
+
+    python benchmarks/sqlite_write_load.py --writers 16 --readers 4 --checkouts 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "fastapi", "fast_dantic"))
+
+# database.py opens "database.db" relative to the working directory, so work in a temp folder
+# to leave the real database untouched.
+os.chdir(tempfile.mkdtemp(prefix="fast_dantic_load_"))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from crud import page_orders  # noqa: E402
+from database import PROFILES, SQLiteProfile, make_engine  # noqa: E402
+from models import Order, OrderItem  # noqa: E402
+
+
+def checkout(session: Session, order_id: int):
+    """The same writes /clean-order makes: the parent order, then its line items, then a commit."""
+    db_order = Order(order_id=order_id, customer_name="Load Test", email="load@example.com", price=1198.0)
+    session.add(db_order)
+    session.flush()
+    for sku in ("CS-001", "SL-001"):
+        session.add(OrderItem(order_id=db_order.id, item_name="Agent", sku=sku, quantity=1, price=599.0))
+    session.commit()
+
+
+def run_profile(name: str, profile: SQLiteProfile, writers: int, readers: int, checkouts: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), f"{name}.db")
+    engine = make_engine(f"sqlite:///{path}", profile)
+    SQLModel.metadata.create_all(engine)
+
+    latencies: list[float] = []
+    failures = 0
+    reads = 0
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def writer(worker: int):
+        nonlocal failures
+        for i in range(checkouts):
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    checkout(session, worker * checkouts + i)
+            except OperationalError:
+                with lock:
+                    failures += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    def reader():
+        nonlocal reads
+        while not done.is_set():
+            with Session(engine) as session:
+                page_orders(session, 50, None, [])
+            with lock:
+                reads += 1
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "writes_per_sec": len(latencies) / elapsed,
+        "p50_ms": quantiles[49],
+        "p99_ms": quantiles[98],
+        "failures": failures,
+        "reads_per_sec": reads / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=16, help="Concurrent checkout threads")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent threads reading /orders pages")
+    parser.add_argument("--checkouts", type=int, default=100, help="Checkouts per writer thread")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.checkouts} checkouts, {args.readers} readers\n")
+    print(f"{'profile':<12} {'writes/s':>10} {'p50':>10} {'p99':>10} {'locked':>8} {'reads/s':>10}")
+    for name, profile in PROFILES.items():
+        result = run_profile(name, profile, args.writers, args.readers, args.checkouts)
+        print(
+            f"{name:<12} {result['writes_per_sec']:>10,.0f} {result['p50_ms']:>8.1f}ms {result['p99_ms']:>8.1f}ms"
+            f" {result['failures']:>8} {result['reads_per_sec']:>10,.0f}"
+        )
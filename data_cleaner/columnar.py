@@ -0,0 +1,93 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+# pyarrow is only needed for columnar output, so we don't force everyone to install it
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# ==========================================
+# Columnar (Parquet / Arrow) Output
+# ==========================================
+# Analytics tools like DuckDB, pandas and Polars read columnar files far faster than JSON,
+# because each column is stored contiguously and already has the right type.
+#
+# The writer below collects plain values (not model objects) column by column, and every
+# `batch_size` rows turns them into one Arrow RecordBatch and writes it out. Memory therefore
+# stays bounded by the batch size, no matter how many orders flow through.
+#
+#     duckdb.sql("SELECT count(*), avg(price) FROM 'clean_orders.parquet'")
+
+COLUMNAR_SUFFIXES = (".parquet", ".arrow", ".feather")
+
+DEFAULT_BATCH_SIZE = 64 * 1024
+
+# Maps the Python annotation of each model field to an Arrow column type
+_ARROW_TYPES = {
+    int: "int64",
+    float: "float64",
+    bool: "bool_",
+    str: "string",
+}
+
+
+def arrow_schema(model: type[BaseModel]) -> "pa.Schema":
+    """Builds an Arrow schema from a model's fields. Anything exotic (like EmailStr) is stored as a string."""
+    return pa.schema(
+        [
+            pa.field(name, getattr(pa, _ARROW_TYPES.get(field.annotation, "string"))(), nullable=not field.is_required())
+            for name, field in model.model_fields.items()
+        ]
+    )
+
+
+class ColumnarOrderWriter:
+    """
+    A valid-order sink that writes bounded-size record batches to a Parquet or Arrow IPC file.
+    The format is picked from the file extension (`.parquet`, or `.arrow` / `.feather`).
+    """
+
+    def __init__(self, path: str, model: type[BaseModel], batch_size: int = DEFAULT_BATCH_SIZE):
+        if pa is None:
+            raise ImportError("Columnar output needs pyarrow: `pip install pyarrow`")
+
+        self.batch_size = batch_size
+        self.schema = arrow_schema(model)
+        self._names = self.schema.names
+        self._columns: list[list] = [[] for _ in self._names]
+        self._rows = 0
+
+        if path.endswith(".parquet"):
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = ipc.new_file(path, self.schema)
+
+    def on_valid(self, index: int, order: BaseModel):
+        # Copy the field values into their columns; the model itself is not kept around
+        for column, name in zip(self._columns, self._names):
+            column.append(getattr(order, name))
+        self._rows += 1
+        if self._rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        batch = pa.record_batch(self._columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        self._columns = [[] for _ in self._names]
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self) -> "ColumnarOrderWriter":
+        return self
+
+    def __exit__(self, *exc_info: Optional[object]):
+        self.close()
@@ -0,0 +1,92 @@
+import random
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from pydantic import ValidationError
+
+# ==========================================
+# Error Aggregation Index
+# ==========================================
+# When a million rows fail with the same bad email, keeping a million ValidationError objects
+# (plus a million raw dicts) tells us nothing new after the first few. Instead we group errors by
+# "which field" + "what kind of error" and keep, for each group:
+#   * how many times it happened
+#   * the first error message, so the report still explains what went wrong
+#   * a small, fixed-size random sample of the rows it happened on (a "reservoir")
+# Memory now grows with the number of DISTINCT kinds of error, not with the number of bad rows.
+
+DEFAULT_SAMPLE_SIZE = 10
+
+# A row that isn't even a JSON object (or, from NDJSON, isn't valid JSON) fails as a whole,
+# so its error has an empty location; reports show it under this name instead
+ROW_LOC = "<row>"
+
+
+@dataclass
+class ErrorBucket:
+    loc: str
+    error_type: str
+    message: str
+    count: int = 0
+    samples: list[Any] = field(default_factory=list)
+
+
+class ErrorIndex:
+    """Counts validation errors by (field location, error type) with a bounded sample of row positions."""
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE, seed: int = 0):
+        self.sample_size = sample_size
+        self.buckets: dict[tuple[str, str], ErrorBucket] = {}
+        # A seeded generator makes the sampled rows identical from run to run
+        self._rng = random.Random(seed)
+
+    def add(self, row: Any, error: ValidationError):
+        """Records every error in `error`. `row` is whatever identifies the input row (e.g. its index)."""
+        self.add_details(row, error.errors(include_url=False, include_context=False, include_input=False))
+
+    def add_details(self, row: Any, details: list[dict]):
+        for detail in details:
+            loc = ".".join(str(part) for part in detail["loc"]) or ROW_LOC
+            key = (loc, detail["type"])
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = ErrorBucket(loc, detail["type"], detail["msg"])
+            bucket.count += 1
+            self._sample(bucket, row)
+
+    def _sample(self, bucket: ErrorBucket, row: Any):
+        # "Reservoir sampling": every row seen so far has the same chance of being in the sample
+        if len(bucket.samples) < self.sample_size:
+            bucket.samples.append(row)
+        else:
+            slot = self._rng.randrange(bucket.count)
+            if slot < self.sample_size:
+                bucket.samples[slot] = row
+
+    def merge(self, other: "ErrorIndex"):
+        """Folds another index (e.g. from a different shard) into this one."""
+        for key, theirs in other.buckets.items():
+            ours = self.buckets.get(key)
+            if ours is None:
+                self.buckets[key] = ErrorBucket(theirs.loc, theirs.error_type, theirs.message, theirs.count, list(theirs.samples))
+                continue
+            # Each merged sample slot comes from either side in proportion to how many rows that side saw
+            total = ours.count + theirs.count
+            pool_ours, pool_theirs = list(ours.samples), list(theirs.samples)
+            merged = []
+            while len(merged) < self.sample_size and (pool_ours or pool_theirs):
+                take_ours = pool_ours and (not pool_theirs or self._rng.randrange(total) < ours.count)
+                merged.append((pool_ours if take_ours else pool_theirs).pop(0))
+            ours.count = total
+            ours.samples = merged
+
+    @property
+    def total(self) -> int:
+        return sum(bucket.count for bucket in self.buckets.values())
+
+    def __iter__(self) -> Iterator[ErrorBucket]:
+        """Most common errors first; ties are broken by field and type so the order is stable."""
+        return iter(sorted(self.buckets.values(), key=lambda b: (-b.count, b.loc, b.error_type)))
+
+    def __len__(self) -> int:
+        return len(self.buckets)
@@ -0,0 +1,90 @@
+import itertools
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import IO, Any, Iterator, Union
+
+# The JSON array parser lives with the API's streaming upload (fastapi/fast_dantic/json_array.py);
+# these scripts run straight from the command line, so we point Python at that folder ourselves
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fastapi", "fast_dantic"))
+from json_array import JSONArrayParser  # noqa: E402
+
+# ==========================================
+# Incremental Order Reader
+# ==========================================
+# `json.load()` reads the WHOLE file into memory and builds every dictionary at once.
+# That is fine for our 9-row `messy_orders.json`, but a multi-GB nightly dump would
+# run the machine out of memory. The reader below instead hands back one order at a
+# time, so only a single record (plus a small read buffer) is ever held in memory.
+#
+# Two input layouts are supported:
+#   1. A JSON array:  [ {...}, {...}, ... ]   (like messy_orders.json)
+#   2. NDJSON:        one JSON object per line (a common format for big data dumps)
+
+# How many characters we read from disk at a time.
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+def _iter_json_array(file: IO[str], buffer: str) -> Iterator[Any]:
+    """Yields the elements of a JSON array one by one, reading the file in chunks."""
+    parser = JSONArrayParser()
+    parser.feed(buffer)
+    while True:
+        yield from parser.values()
+        if parser.closed:
+            return
+        chunk = file.read(CHUNK_SIZE)
+        if chunk:
+            parser.feed(chunk)
+        else:
+            parser.close()
+
+
+@dataclass
+class MalformedLine:
+    """An NDJSON line that isn't valid JSON. It is yielded as a row of its own, so it gets reported like any bad order."""
+
+    line_number: int
+    text: str
+
+    def __str__(self) -> str:
+        return f"line {self.line_number}: {self.text}"
+
+
+def _iter_ndjson(file: IO[str], buffer: str) -> Iterator[Union[dict, MalformedLine]]:
+    """Yields one decoded object per non-blank line (or a MalformedLine if it doesn't parse)."""
+    # The first chunk we peeked at probably ends halfway through a line,
+    # so we finish that last line off with readline() before switching to line iteration.
+    *lines, partial = buffer.split("\n")
+    lines.append(partial + file.readline())
+    for line_number, line in enumerate(itertools.chain(lines, file), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield MalformedLine(line_number, line.rstrip("\n"))
+
+
+def iter_orders(file: IO[str]) -> Iterator[dict]:
+    """
+    Lazily yields raw order dictionaries from an open text file.
+    The layout (JSON array vs NDJSON) is detected from the first non-whitespace character.
+    A broken NDJSON line comes out as a MalformedLine; a broken JSON array raises ValueError.
+    """
+    # Peek at the start of the file to figure out which layout we are dealing with.
+    # We read a fixed-size chunk (not a line) because a minified array is one giant line.
+    buffer = ""
+    while not buffer:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            return  # An empty file simply has no orders
+        buffer = chunk.lstrip(_WHITESPACE)
+
+    if buffer[0] == "[":
+        yield from _iter_json_array(file, buffer)
+    else:
+        yield from _iter_ndjson(file, buffer)
@@ -0,0 +1,252 @@
+"""
+Multi-process order validation.
+
+Splits one big file (or a whole directory of files) into byte-range "shards" and
+validates them on every CPU core at once with a ProcessPoolExecutor. A big JSON array
+is read by the main process and handed out to the workers in batches of orders.
+
+Run with:
+
+    python data_cleaner/parallel_validate.py big_orders.ndjson --workers 32
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Union
+
+from pydantic import ValidationError
+
+from error_index import ErrorIndex
+from order_stream import CHUNK_SIZE, JSONArrayParser, iter_orders
+from reports import write_error_summary
+from validate_orders import CustomerOrder
+
+# Files we pick up when the input is a directory
+ORDER_FILE_SUFFIXES = (".json", ".ndjson", ".jsonl")
+
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+# How many orders of a big JSON array go to a worker at a time
+ARRAY_BATCH_ORDERS = 10_000
+
+
+# ==========================================
+# Shards
+# ==========================================
+class Shard(NamedTuple):
+    path: str
+    start: int
+    # `None` means "to the end of the file"
+    end: Optional[int]
+
+
+class ArrayBatch(NamedTuple):
+    path: str
+    # Index of the first order in the array, so errors still point at the right rows
+    first_index: int
+    # The JSON text of each order
+    orders: list[str]
+
+
+class ShardResult(NamedTuple):
+    valid: int
+    invalid: int
+    # Sample rows are `(path, position)`: the byte offset of an NDJSON line, or the index in a JSON array.
+    # Only counts and a few samples per kind of error cross the process boundary, never every error.
+    errors: ErrorIndex
+
+
+def _is_ndjson(path: str) -> bool:
+    """A file is NDJSON unless its first non-whitespace byte opens a JSON array."""
+    with open(path, "rb") as file:
+        while chunk := file.read(4096):
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[:1] != b"["
+    return True
+
+
+def list_input_files(path: str) -> list[str]:
+    """Expands a directory into its order files, sorted so the output order is always the same."""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name)
+        for name in os.listdir(path)
+        if name.endswith(ORDER_FILE_SUFFIXES)
+    )
+
+
+def plan_shards(path: str, shard_bytes: int = DEFAULT_SHARD_BYTES) -> list[Shard]:
+    """
+    Cuts the input into shards of roughly `shard_bytes` each.
+
+    NDJSON files are cut at fixed byte offsets; the worker then snaps each cut to the next
+    line break, so every record is read by exactly one shard. A JSON array can't be cut
+    safely without parsing it (a "}," may sit inside a string), so each array file is one
+    shard; `parallel_validate` splits the big ones into ArrayBatches as it reads them.
+    """
+    shards = []
+    for file_path in list_input_files(path):
+        size = os.path.getsize(file_path)
+        if not _is_ndjson(file_path) or size <= shard_bytes:
+            shards.append(Shard(file_path, 0, None))
+            continue
+        for start in range(0, size, shard_bytes):
+            end = start + shard_bytes
+            shards.append(Shard(file_path, start, end if end < size else None))
+    return shards
+
+
+def iter_array_batches(path: str, batch_orders: int = ARRAY_BATCH_ORDERS) -> Iterator[ArrayBatch]:
+    """Reads a JSON array file and yields its orders, as JSON text, `batch_orders` at a time."""
+    parser = JSONArrayParser()
+    batch: list[str] = []
+    first_index = 0
+    with open(path, "r") as file:
+        while not parser.closed:
+            chunk = file.read(CHUNK_SIZE)
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+            for order in parser.raw_values():
+                batch.append(order)
+                if len(batch) == batch_orders:
+                    yield ArrayBatch(path, first_index, batch)
+                    first_index += len(batch)
+                    batch = []
+    if batch:
+        yield ArrayBatch(path, first_index, batch)
+
+
+# ==========================================
+# Worker (runs inside each child process)
+# ==========================================
+def _validate_ndjson_range(shard: Shard) -> ShardResult:
+    valid = invalid = 0
+    errors = ErrorIndex()
+    with open(shard.path, "rb") as file:
+        if shard.start > 0:
+            # Step back one byte and finish that line: a line belongs to the shard its first byte is in
+            file.seek(shard.start - 1)
+            file.readline()
+        while shard.end is None or file.tell() < shard.end:
+            position = file.tell()
+            line = file.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                # model_validate_json parses the bytes in Rust, without building a dict first
+                CustomerOrder.model_validate_json(line)
+                valid += 1
+            except ValidationError as e:
+                invalid += 1
+                errors.add((shard.path, position), e)
+    return ShardResult(valid, invalid, errors)
+
+
+def _validate_json_array(shard: Shard) -> ShardResult:
+    valid = invalid = 0
+    errors = ErrorIndex()
+    with open(shard.path, "r") as file:
+        for index, raw_order in enumerate(iter_orders(file)):
+            try:
+                CustomerOrder.model_validate(raw_order)
+                valid += 1
+            except ValidationError as e:
+                invalid += 1
+                errors.add((shard.path, index), e)
+    return ShardResult(valid, invalid, errors)
+
+
+def _validate_array_batch(batch: ArrayBatch) -> ShardResult:
+    valid = invalid = 0
+    errors = ErrorIndex()
+    for index, order in enumerate(batch.orders, start=batch.first_index):
+        try:
+            CustomerOrder.model_validate_json(order)
+            valid += 1
+        except ValidationError as e:
+            invalid += 1
+            errors.add((batch.path, index), e)
+    return ShardResult(valid, invalid, errors)
+
+
+def validate_shard(shard: Union[Shard, ArrayBatch]) -> ShardResult:
+    """Validates every record in one shard (or batch of array orders) and returns its counts and errors."""
+    if isinstance(shard, ArrayBatch):
+        return _validate_array_batch(shard)
+    if _is_ndjson(shard.path):
+        return _validate_ndjson_range(shard)
+    return _validate_json_array(shard)
+
+
+# ==========================================
+# Engine
+# ==========================================
+def _work(shards: list[Shard], shard_bytes: int) -> Iterator[Union[Shard, ArrayBatch]]:
+    for shard in shards:
+        if not _is_ndjson(shard.path) and os.path.getsize(shard.path) > shard_bytes:
+            yield from iter_array_batches(shard.path)
+        else:
+            yield shard
+
+
+def _map_in_order(pool: Executor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Like `pool.map(fn, items)`, but keeps at most `window` items in flight. `Executor.map` submits
+    everything up front, which would hold a whole JSON array's batches in memory at once.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def parallel_validate(
+    path: str,
+    workers: Optional[int] = None,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> ShardResult:
+    """
+    Validates a file or directory across `workers` processes (default: one per CPU).
+    Results are merged in shard order, so the error report is identical from run to run.
+    """
+    shards = plan_shards(path, shard_bytes)
+    workers = workers or os.cpu_count() or 1
+    valid = invalid = 0
+    errors = ErrorIndex()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Results come back in the order the work was submitted, not the order it finishes.
+        # Two items per worker keeps everyone busy while we read the next batch of a big array.
+        for result in _map_in_order(pool, validate_shard, _work(shards, shard_bytes), 2 * workers):
+            valid += result.valid
+            invalid += result.invalid
+            errors.merge(result.errors)
+    return ShardResult(valid, invalid, errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Order file (JSON array / NDJSON) or a directory of them")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (default: CPU count)")
+    parser.add_argument("--shard-mb", type=int, default=DEFAULT_SHARD_BYTES // (1024 * 1024), help="Target shard size in MB")
+    args = parser.parse_args()
+
+    try:
+        result = parallel_validate(args.input, args.workers, args.shard_mb * 1024 * 1024)
+    except ValueError as e:
+        sys.exit(f"Error: Could not read {args.input}: {e}")
+
+    if result.invalid:
+        write_error_summary(sys.stdout.write, result.errors, lambda row: f"{row[0]}@{row[1]}")
+
+    print("-" * 40)
+    print(f"Validation Complete: {result.valid} valid, {result.invalid} invalid.")
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import sys
+from typing import Optional, TextIO
+
+from pydantic import BaseModel, ValidationError
+
+from error_index import DEFAULT_SAMPLE_SIZE, ROW_LOC, ErrorIndex
+
+# ==========================================
+# Report Writers
+# ==========================================
+# Calling print() several times per order is fine for 9 rows, but on millions of rows the
+# terminal I/O costs more than the validation itself. A report writer receives each result,
+# formats it into an in-memory buffer, and only writes to the real output in large chunks.
+#
+# Every writer has the same two "sink" methods (`on_valid` / `on_invalid`), so any of them can be
+# plugged straight into `stream_validate_orders()`.
+
+# Flush to the real output once roughly this many characters are buffered
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class ReportWriter:
+    """Base class: buffers text and writes it to `out` in large chunks. Reports nothing per row."""
+
+    def __init__(self, out: Optional[TextIO] = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.out = out or sys.stdout
+        self.buffer_size = buffer_size
+        self._chunks: list[str] = []
+        self._buffered = 0
+
+    def _write(self, text: str):
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            # One big write() call instead of thousands of small ones
+            self.out.write("".join(self._chunks))
+            self._chunks.clear()
+            self._buffered = 0
+        self.out.flush()
+
+    def close(self):
+        """Called once after the last row; writes any closing section and flushes."""
+        self.flush()
+
+    def on_valid(self, index: int, order: BaseModel):
+        pass
+
+    def on_invalid(self, index: int, raw_order, error: ValidationError):
+        pass
+
+
+class SummaryReport(ReportWriter):
+    """Writes nothing per row; only the final counts are shown. Used by `--quiet`."""
+
+
+class ConsoleReport(ReportWriter):
+    """The human-friendly, emoji-filled output, buffered instead of printed line by line."""
+
+    def on_valid(self, index: int, order: BaseModel):
+        # The repr() shows how Pydantic coerced the data (e.g., string "102" -> int 102)
+        self._write(f"✅ Row {index} SUCCESS:\n   Clean: {order!r}\n\n")
+
+    def on_invalid(self, index: int, raw_order, error: ValidationError):
+        lines = [f"❌ Row {index} FAILED:", f"    Input: {raw_order}", "   Errors:"]
+        # e.errors() returns a list of dictionaries detailing every error found
+        for detail in error.errors():
+            field_name = detail["loc"][0] if detail["loc"] else ROW_LOC
+            lines.append(f"      - Field '{field_name}': {detail['msg']}")
+        self._write("\n".join(lines) + "\n\n")
+
+
+class NDJSONErrorReport(ReportWriter):
+    """One JSON object per rejected row: its index, raw input and error details."""
+
+    def on_invalid(self, index: int, raw_order, error: ValidationError):
+        # include_url=False keeps each line short; the docs link is identical on every row
+        reject = {"row": index, "input": raw_order, "errors": error.errors(include_url=False)}
+        self._write(json.dumps(reject, default=str) + "\n")
+
+
+class CSVRejectReport(ReportWriter):
+    """A spreadsheet-friendly CSV with one line per error (a row with two bad fields gets two lines)."""
+
+    HEADER = ["row", "order_id", "field", "error_type", "message", "input"]
+
+    def __init__(self, out: Optional[TextIO] = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        super().__init__(out, buffer_size)
+        # csv.writer formats into a StringIO, which we then drain into our own buffer
+        self._csv_buffer = io.StringIO()
+        self._csv = csv.writer(self._csv_buffer)
+        self._csv.writerow(self.HEADER)
+        self._drain_csv()
+
+    def _drain_csv(self):
+        self._write(self._csv_buffer.getvalue())
+        self._csv_buffer.seek(0)
+        self._csv_buffer.truncate()
+
+    def on_invalid(self, index: int, raw_order, error: ValidationError):
+        order_id = raw_order.get("order_id") if isinstance(raw_order, dict) else None
+        for detail in error.errors():
+            field_name = ".".join(str(part) for part in detail["loc"])
+            self._csv.writerow([index, order_id, field_name, detail["type"], detail["msg"], json.dumps(raw_order, default=str)])
+        self._drain_csv()
+
+
+class AggregateErrorReport(ReportWriter):
+    """
+    Groups failures by (field, error type) and prints one line per group at the end,
+    with a count and a few sample row numbers, instead of one block per bad row.
+    """
+
+    def __init__(self, out: Optional[TextIO] = None, buffer_size: int = DEFAULT_BUFFER_SIZE, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        super().__init__(out, buffer_size)
+        self.errors = ErrorIndex(sample_size)
+
+    def on_invalid(self, index: int, raw_order, error: ValidationError):
+        self.errors.add(index, error)
+
+    def close(self):
+        write_error_summary(self._write, self.errors)
+        self.flush()
+
+
+def write_error_summary(write, errors: ErrorIndex, format_row=str):
+    """Formats an ErrorIndex as a small table, most frequent error first."""
+    write(f"{errors.total:,} errors of {len(errors)} distinct kinds:\n")
+    for bucket in errors:
+        samples = ", ".join(format_row(row) for row in sorted(bucket.samples))
+        write(f"  - Field '{bucket.loc}' [{bucket.error_type}] x {bucket.count:,}: {bucket.message}\n")
+        write(f"      sample rows: {samples}\n")
+
+
+REPORT_FORMATS = {
+    "console": ConsoleReport,
+    "summary": SummaryReport,
+    "ndjson": NDJSONErrorReport,
+    "csv": CSVRejectReport,
+    "aggregate": AggregateErrorReport,
+}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts import each other by plain name (`from order_stream import ...`), like `python validate_orders.py` runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
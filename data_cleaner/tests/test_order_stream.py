@@ -0,0 +1,33 @@
+import json
+
+from order_stream import MalformedLine, iter_orders
+from parallel_validate import parallel_validate
+from validate_orders import stream_validate_orders
+
+ORDER = {"order_id": 1, "customer_name": "Ada", "email": "ada@example.com", "price": 9.5}
+
+
+def write_ndjson(path, lines):
+    path.write_text("".join(line + "\n" for line in lines))
+    return str(path)
+
+
+def test_broken_ndjson_line_is_an_invalid_row(tmp_path):
+    path = write_ndjson(tmp_path / "orders.ndjson", [json.dumps(ORDER), "", '{"order_id": 2, "price": ', json.dumps(ORDER)])
+
+    with open(path) as file:
+        rows = list(iter_orders(file))
+    assert rows[1] == MalformedLine(3, '{"order_id": 2, "price": ')
+
+    invalid = []
+    counts = stream_validate_orders(path, lambda index, order: None, lambda *row: invalid.append(row))
+    assert counts == (2, 1)
+    index, raw_order, error = invalid[0]
+    assert index == 1
+    assert raw_order.line_number == 3
+    assert error.errors()[0]["type"] == "json_invalid"
+
+    # The multi-process engine counts the same line the same way
+    result = parallel_validate(path, workers=1)
+    assert (result.valid, result.invalid) == (2, 1)
+    assert [bucket.error_type for bucket in result.errors] == ["json_invalid"]
@@ -0,0 +1,21 @@
+import json
+
+from parallel_validate import iter_array_batches, parallel_validate
+
+ORDER = {"order_id": 1, "customer_name": "Ada", "email": "ada@example.com", "price": 9.5}
+
+
+def test_big_json_array_is_split_into_batches(tmp_path):
+    orders = [dict(ORDER, order_id=n, price=-1 if n % 10 == 3 else 9.5) for n in range(50)]
+    path = tmp_path / "orders.json"
+    path.write_text(json.dumps(orders))
+
+    batches = list(iter_array_batches(str(path), batch_orders=20))
+    assert [(batch.first_index, len(batch.orders)) for batch in batches] == [(0, 20), (20, 20), (40, 10)]
+    assert json.loads(batches[1].orders[0]) == orders[20]
+
+    # A shard size smaller than the file sends the array out in batches; rows keep their array index
+    result = parallel_validate(str(path), workers=1, shard_bytes=100)
+    assert (result.valid, result.invalid) == (45, 5)
+    [bucket] = result.errors
+    assert sorted(row for _, row in bucket.samples) == [3, 13, 23, 33, 43]
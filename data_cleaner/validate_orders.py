@@ -1,7 +1,14 @@
-import json
+import argparse
 import os
+import sys
+from contextlib import ExitStack, nullcontext
+from typing import Callable, Optional
 from pydantic import BaseModel, EmailStr, ValidationError, Field
 
+from columnar import COLUMNAR_SUFFIXES, ColumnarOrderWriter
+from order_stream import MalformedLine, iter_orders
+from reports import REPORT_FORMATS, ConsoleReport, NDJSONErrorReport, ReportWriter, SummaryReport
+
 
 # This is your strict data contract
 class CustomerOrder(BaseModel):
@@ -15,56 +22,139 @@ class CustomerOrder(BaseModel):
     is_priority: bool = False  # If missing, it defaults to False
 
 
-def validate_orders(filepath: str):
-    """Reads a JSON file of orders and validates each one."""
-    print(f"Loading orders from: {filepath}\n")
-    
+# ==========================================
+# Streaming Mode (constant memory)
+# ==========================================
+# A "sink" is just a function that receives each result as soon as it is ready.
+# Nothing is collected into lists, so memory use stays flat however big the input file is.
+ValidSink = Callable[[int, CustomerOrder], None]
+InvalidSink = Callable[[int, dict, ValidationError], None]
+
+
+def stream_validate_orders(
+    filepath: str,
+    on_valid: ValidSink,
+    on_invalid: InvalidSink,
+) -> tuple[int, int]:
+    """
+    Validates orders one at a time as they are read from disk, sending each one to a sink.
+    Accepts either a JSON array or NDJSON (one order per line).
+    Returns a `(valid_count, invalid_count)` tuple; raises ValueError if a JSON array is malformed.
+    """
+    valid_count = 0
+    invalid_count = 0
+
+    with open(filepath, "r") as file:
+        # `enumerate` gives every order a row index so failures can be traced back to the input
+        for index, raw_order in enumerate(iter_orders(file)):
+            try:
+                if isinstance(raw_order, MalformedLine):
+                    # Fails with the same "json_invalid" error the parallel engine reports for this line
+                    validated_order = CustomerOrder.model_validate_json(raw_order.text)
+                else:
+                    # model_validate() (unlike **unpacking) also turns a non-object row into a ValidationError
+                    validated_order = CustomerOrder.model_validate(raw_order)
+            except ValidationError as e:
+                invalid_count += 1
+                on_invalid(index, raw_order, e)
+            else:
+                valid_count += 1
+                on_valid(index, validated_order)
+
+    return valid_count, invalid_count
+
+
+def validate_orders(filepath: str, report: Optional[ReportWriter] = None, quiet: bool = False):
+    """
+    Reads a JSON file of orders, validates each one, and hands every result to a report writer.
+    With `quiet=True` nothing is printed except the final counts.
+    """
+    if quiet:
+        report = SummaryReport()
+    else:
+        report = report or ConsoleReport()
+        print(f"Loading orders from: {filepath}\n")
+
     try:
-        with open(filepath, 'r') as file:
-            orders_data = json.load(file)
+        valid_count, invalid_count = stream_validate_orders(filepath, report.on_valid, report.on_invalid)
     except FileNotFoundError:
         print(f"Error: Could not find file {filepath}")
         return
-        
-    valid_orders = []
-    invalid_orders = []
+    except ValueError as e:
+        # Broken JSON (not a bad order, those go to the report) stops the read
+        print(f"Error: Could not read {filepath}: {e}")
+        return
+    finally:
+        # Whatever happened, push out anything still sitting in the report buffer
+        report.close()
+
+    print_counts(valid_count, invalid_count, quiet)
+
+
+def print_counts(valid_count: int, invalid_count: int, quiet: bool = False):
+    """The one line every mode ends with."""
+    if not quiet:
+        print("-" * 40)
+    print(f"Validation Complete: {valid_count} valid, {invalid_count} invalid.")
+
+
+def stream_to_files(filepath: str, valid_path: Optional[str], invalid_path: Optional[str], quiet: bool = False):
+    """
+    Streams `filepath` through validation, writing clean orders and rejects to separate files.
+    Clean orders go to NDJSON, or to Parquet / Arrow when `valid_path` ends in one of `COLUMNAR_SUFFIXES`.
+    Passing `None` for a path simply discards that side of the results.
+    """
+    if not quiet:
+        print(f"Streaming orders from: {filepath}\n")
+
+    # ExitStack closes every output we open, whichever kind it turns out to be
+    with ExitStack() as outputs:
+        if valid_path and valid_path.endswith(COLUMNAR_SUFFIXES):
+            write_valid = outputs.enter_context(ColumnarOrderWriter(valid_path, CustomerOrder)).on_valid
+        else:
+            # `os.devnull` is used for any sink we don't care about
+            valid_file = outputs.enter_context(open(valid_path or os.devnull, "w"))
+
+            def write_valid(index: int, order: CustomerOrder):
+                # model_dump_json() serializes straight to a JSON string without an intermediate dict
+                valid_file.write(order.model_dump_json() + "\n")
+
+        invalid_file = outputs.enter_context(open(invalid_path or os.devnull, "w"))
+        rejects = NDJSONErrorReport(invalid_file)
 
-    # Loop through the raw dictionary data
-    for raw_order in orders_data:
         try:
-            # We use **raw_order to unpack the dictionary into keyword arguments
-            # e.g., CustomerOrder(order_id=101, customer_name="Alice...")
-            validated_order = CustomerOrder(**raw_order)
-            
-            # If we get here, the data was valid!
-            valid_orders.append(validated_order)
-            
-            print(f"✅ {raw_order['order_id']} SUCCESS:")
-            # Printing the repr() shows how Pydantic coerced the data (e.g., string "102" -> int 102)
-            print(f"   Input: {raw_order}")
-            print(f"   Clean: {repr(validated_order)}\n")
-            
-        except ValidationError as e:
-            # If validation fails, Pydantic raises this exception
-            invalid_orders.append((raw_order, e))
-            
-            print(f"❌ {raw_order['order_id']} FAILED:")
-            print(f"    Input: {raw_order}")
-            print("   Errors:")
-            # e.errors() returns a list of dictionaries detailing every error found
-            for error in e.errors():
-                field_name = error['loc'][0]
-                error_msg = error['msg']
-                print(f"      - Field '{field_name}': {error_msg}")
-            print()
-
-    print("-" * 40)
-    print(f"Validation Complete: {len(valid_orders)} valid, {len(invalid_orders)} invalid.")
+            valid_count, invalid_count = stream_validate_orders(filepath, write_valid, rejects.on_invalid)
+        except FileNotFoundError:
+            print(f"Error: Could not find file {filepath}")
+            return
+        except ValueError as e:
+            print(f"Error: Could not read {filepath}: {e}")
+            return
+        finally:
+            rejects.close()
+
+    print_counts(valid_count, invalid_count, quiet)
 
 
 if __name__ == "__main__":
     # Get the absolute path to the json file, assuming it's in the same directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     json_path = os.path.join(script_dir, "messy_orders.json")
-    
-    validate_orders(json_path)
+
+    parser = argparse.ArgumentParser(description="Validate a file of customer orders with Pydantic.")
+    parser.add_argument("input", nargs="?", default=json_path, help="JSON array or NDJSON file of orders")
+    parser.add_argument("--stream", action="store_true", help="Validate in constant memory, one order at a time")
+    parser.add_argument("--valid-out", help="(stream mode) File to write clean orders to: NDJSON, or .parquet / .arrow")
+    parser.add_argument("--invalid-out", help="(stream mode) NDJSON file to write rejected orders to")
+    parser.add_argument("--report", choices=REPORT_FORMATS, default="console", help="Per-row report format")
+    parser.add_argument("--report-out", help="File to write the report to (default: the terminal)")
+    parser.add_argument("--quiet", action="store_true", help="Throughput mode: only print the final counts")
+    args = parser.parse_args()
+
+    if args.stream:
+        stream_to_files(args.input, args.valid_out, args.invalid_out, args.quiet)
+    else:
+        # nullcontext() lets the terminal stand in for a file without closing it at the end
+        with open(args.report_out, "w") if args.report_out else nullcontext(sys.stdout) as report_out:
+            report = REPORT_FORMATS[args.report](report_out)
+            validate_orders(args.input, report, args.quiet)
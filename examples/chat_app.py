@@ -9,20 +9,26 @@ from __future__ import annotations as _annotations
 
 import asyncio
 import json
+import os
 import sqlite3
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
 from collections.abc import AsyncIterator, Callable
 from concurrent.futures.thread import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from functools import partial
 from pathlib import Path
-from typing import Annotated, Any, Literal, TypeVar
+from typing import Annotated, Any, Literal, TypeVar, get_args
 
 import fastapi
 import logfire
-from fastapi import Depends, Request
+from fastapi import Cookie, Depends, Request
 from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
 from typing_extensions import LiteralString, ParamSpec, TypedDict
 
 from pydantic_ai import (
@@ -31,11 +37,20 @@ from pydantic_ai import (
     ModelMessagesTypeAdapter,
     ModelRequest,
     ModelResponse,
+    SystemPromptPart,
     TextPart,
+    ToolCallPart,
+    ToolReturnPart,
     UnexpectedModelBehavior,
     UserPromptPart,
 )
 
+# optional: only the 'zstd' history codec needs it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # 'if-token-present' means nothing will be sent (and the example will work) if you don't have logfire configured
 logfire.configure(send_to_logfire='if-token-present')
 logfire.instrument_pydantic_ai()
@@ -46,12 +61,20 @@ THIS_DIR = Path(__file__).parent
 
 @asynccontextmanager
 async def lifespan(_app: fastapi.FastAPI):
-    async with Database.connect() as db:
+    async with Database.connect(codec=HISTORY_CODEC) as db:
         yield {'db': db}
 
 
+def request_attributes(_request: Any, attributes: dict[str, Any]) -> dict[str, Any]:
+    # logfire records every dependency's value on the request span; the `Database`
+    # holds the decoded history of every cached conversation, and serializing it
+    # dwarfed the queries
+    attributes.get('values', {}).pop('database', None)
+    return attributes
+
+
 app = fastapi.FastAPI(lifespan=lifespan)
-logfire.instrument_fastapi(app)
+logfire.instrument_fastapi(app, request_attributes_mapper=request_attributes)
 
 
 @app.get('/')
@@ -69,12 +92,43 @@ async def get_db(request: Request) -> Database:
     return request.state.db
 
 
+CONVERSATION_COOKIE = 'conversation_id'
+
+
+async def get_conversation_id(
+    database: Database = Depends(get_db),
+    conversation_id: Annotated[str | None, Cookie()] = None,
+) -> str:
+    """Each browser gets its own conversation, identified by a cookie.
+
+    The cookie is set by `with_conversation_cookie`. A browser without one first gets
+    any history left over from before conversations existed (see
+    `Database.claim_unowned_conversation`), and otherwise a new, empty conversation.
+    """
+    if conversation_id:
+        return conversation_id
+    return await database.claim_unowned_conversation() or uuid.uuid4().hex
+
+
+def with_conversation_cookie(response: Response, conversation_id: str) -> Response:
+    response.set_cookie(
+        CONVERSATION_COOKIE, conversation_id, httponly=True, samesite='lax'
+    )
+    return response
+
+
 @app.get('/chat/')
-async def get_chat(database: Database = Depends(get_db)) -> Response:
-    msgs = await database.get_messages()
-    return Response(
-        b'\n'.join(json.dumps(to_chat_message(m)).encode('utf-8') for m in msgs),
-        media_type='text/plain',
+async def get_chat(
+    database: Database = Depends(get_db),
+    conversation_id: str = Depends(get_conversation_id),
+) -> Response:
+    msgs = await database.get_messages(conversation_id)
+    return with_conversation_cookie(
+        Response(
+            b'\n'.join(json.dumps(to_chat_message(m)).encode('utf-8') for m in msgs),
+            media_type='text/plain',
+        ),
+        conversation_id,
     )
 
 
@@ -108,7 +162,9 @@ def to_chat_message(m: ModelMessage) -> ChatMessage:
 
 @app.post('/chat/')
 async def post_chat(
-    prompt: Annotated[str, fastapi.Form()], database: Database = Depends(get_db)
+    prompt: Annotated[str, fastapi.Form()],
+    database: Database = Depends(get_db),
+    conversation_id: str = Depends(get_conversation_id),
 ) -> StreamingResponse:
     async def stream_messages():
         """Streams new line delimited JSON `Message`s to the client."""
@@ -123,10 +179,11 @@ async def post_chat(
             ).encode('utf-8')
             + b'\n'
         )
-        # get the chat history so far to pass as context to the agent
-        messages = await database.get_messages()
+        # get the chat history so far, trimmed to the window the agent gets as context
+        messages = await database.get_messages(conversation_id)
+        history = await history_policy.apply(database, conversation_id, messages)
         # run the agent with the user prompt and the chat history
-        async with agent.run_stream(prompt, message_history=messages) as result:
+        async with agent.run_stream(prompt, message_history=history) as result:
             async for text in result.stream_output(debounce_by=0.01):
                 # text here is a `str` and the frontend wants
                 # JSON encoded ModelResponse, so we create one
@@ -134,71 +191,464 @@ async def post_chat(
                 yield json.dumps(to_chat_message(m)).encode('utf-8') + b'\n'
 
         # add new messages (e.g. the user prompt and the agent response in this case) to the database
-        await database.add_messages(result.new_messages_json())
+        await database.add_messages(conversation_id, result.new_messages_json())
+
+    return with_conversation_cookie(
+        StreamingResponse(stream_messages(), media_type='text/plain'), conversation_id
+    )
+
 
-    return StreamingResponse(stream_messages(), media_type='text/plain')
+def estimate_tokens(text: str) -> int:
+    """Roughly how many tokens `text` is: about four characters per token for English.
+
+    Set `HistoryPolicy.tokenizer` for an exact count, e.g. with tiktoken:
+    `lambda text: len(tiktoken.encoding_for_model('gpt-4o').encode(text))`.
+    """
+    return (len(text) + 3) // 4
+
+
+def message_text(message: ModelMessage) -> str:
+    """The text of a message, as the model sees it."""
+    texts: list[str] = []
+    for part in message.parts:
+        if isinstance(part, ToolCallPart):
+            texts.append(f'{part.tool_name}({part.args_as_json_str()})')
+        elif isinstance(part, ToolReturnPart):
+            texts.append(part.model_response_str())
+        else:
+            content = getattr(part, 'content', '')
+            if not isinstance(content, str):
+                content = json.dumps(content, default=str)
+            texts.append(content)
+    return '\n'.join(texts)
+
+
+def turn_starts(messages: list[ModelMessage]) -> list[int]:
+    """Indexes of the messages that start a turn, i.e. requests carrying a user prompt.
+
+    History is only ever cut here: cutting anywhere else could separate
+    a tool call from its result, which models reject.
+    """
+    return [
+        i
+        for i, m in enumerate(messages)
+        if isinstance(m, ModelRequest)
+        and any(isinstance(p, UserPromptPart) for p in m.parts)
+    ]
+
+
+@dataclass
+class HistorySummary:
+    """Summary of the first `covered_messages` messages of a conversation."""
+
+    covered_messages: int
+    text: str
+
+
+summary_agent = Agent(
+    instructions=(
+        'Summarize the conversation below for an assistant that will continue it. '
+        'Keep names, numbers, decisions and open questions. At most 200 words.'
+    ),
+)
+
+
+@dataclass
+class HistoryPolicy:
+    """How much of a conversation is sent to the model along with each new prompt.
+
+    Whole turns are kept, newest first, up to `max_turns` and `max_tokens` of history
+    (counted by `tokenizer`); the latest turn is always kept. With `summarize`, the
+    older turns aren't just dropped: they're condensed into a summary, stored in the
+    database and sent ahead of the recent turns.
+    """
+
+    max_turns: int | None = 20
+    max_tokens: int | None = 8_000
+    tokenizer: Callable[[str], int] = estimate_tokens
+    # off by default: every time the summary is extended, that's an extra call to the
+    # model (and its latency and tokens) on top of answering the prompt
+    summarize: bool = False
+    # when the summary has to be extended, the recent turns are trimmed to this fraction
+    # of the limits, so it's extended every few turns instead of on every single request
+    compact_to: float = 0.5
+
+    def window_start(
+        self, messages: list[ModelMessage], reserved_tokens: int = 0, scale: float = 1
+    ) -> int:
+        """Index of the first message to send as-is, for limits scaled by `scale`."""
+        starts = turn_starts(messages)
+        if not starts:
+            return 0
+        if self.max_turns is not None:
+            starts = starts[-max(1, int(self.max_turns * scale)) :]
+        if self.max_tokens is not None:
+            budget = self.max_tokens * scale - reserved_tokens
+            ends = [*starts[1:], len(messages)]
+            tokens = 0
+            # walk back from the newest turn, so an exact tokenizer only sees what's
+            # kept (plus one turn)
+            for i in reversed(range(len(starts))):
+                tokens += sum(
+                    self.tokenizer(message_text(m))
+                    for m in messages[starts[i] : ends[i]]
+                )
+                if tokens > budget and i < len(starts) - 1:
+                    return starts[i + 1]
+        return starts[0]
+
+    async def apply(
+        self, database: Database, conversation_id: str, messages: list[ModelMessage]
+    ) -> list[ModelMessage]:
+        """The history to send to the model with the next prompt."""
+        summary = (
+            await database.get_summary(conversation_id) if self.summarize else None
+        )
+        reserved = self.tokenizer(summary.text) if summary else 0
+        start = self.window_start(messages, reserved)
+        if not self.summarize:
+            return messages[start:]
+        if start == 0 and summary is None:
+            return messages
+
+        if summary is None or summary.covered_messages < start:
+            start = self.window_start(messages, reserved, scale=self.compact_to)
+            summary = await self._summarize(summary, messages, start)
+            await database.save_summary(conversation_id, summary)
+        else:
+            # the summary already covers everything outside the window
+            start = summary.covered_messages
+        summary_message = ModelRequest(
+            parts=[
+                SystemPromptPart(
+                    f'Summary of the earlier conversation:\n{summary.text}'
+                )
+            ]
+        )
+        return [summary_message, *messages[start:]]
+
+    @staticmethod
+    async def _summarize(
+        previous: HistorySummary | None, messages: list[ModelMessage], end: int
+    ) -> HistorySummary:
+        """Extends `previous` (if any) with `messages[:end]` it doesn't cover yet."""
+        lines: list[str] = []
+        if previous is not None:
+            lines.append(f'Summary so far:\n{previous.text}\n')
+        for m in messages[previous.covered_messages if previous else 0 : end]:
+            role = 'user' if isinstance(m, ModelRequest) else 'assistant'
+            lines.append(f'{role}: {message_text(m)}')
+        with logfire.span('summarize chat history'):
+            result = await summary_agent.run('\n'.join(lines), model=agent.model)
+        return HistorySummary(end, result.output)
+
+
+history_policy = HistoryPolicy()
 
 
 P = ParamSpec('P')
 R = TypeVar('R')
 
 
+@dataclass
+class _HistoryCache:
+    """Already decoded messages of one conversation, and the id of their last row."""
+
+    last_id: int = 0
+    messages: list[ModelMessage] = field(default_factory=list)
+
+
+# how many conversations' decoded messages are kept in memory
+MAX_CACHED_CONVERSATIONS = 1_000
+
+# `PRAGMA user_version` of the current schema, see `_migrate`
+SCHEMA_VERSION = 3
+
+HistoryCodec = Literal['json', 'zlib', 'zstd']
+
+# how new rows of messages are stored, see `encode_messages`; a typo fails at startup,
+# not on the first write
+HISTORY_CODEC: HistoryCodec = TypeAdapter(HistoryCodec).validate_python(
+    os.environ.get('CHAT_APP_HISTORY_CODEC', 'json')
+)
+
+# A stored row starts with a one-byte tag saying how it's encoded. Rows without one
+# are plain JSON, as written before codecs existed (and still by 'json'): JSON text
+# never starts with these bytes.
+_ZLIB_JSON = b'\x01'
+_ZSTD_JSON = b'\x02'
+
+
+def encode_messages(messages: bytes, codec: HistoryCodec) -> bytes:
+    """Encodes the JSON of a list of messages for storage.
+
+    The compressed codecs still hold JSON, rather than e.g. msgpack, so that
+    `decode_messages` can hand the bytes straight to pydantic-core.
+    """
+    if codec == 'json':
+        return messages
+    if codec == 'zlib':
+        return _ZLIB_JSON + zlib.compress(messages)
+    if codec == 'zstd':
+        return _ZSTD_JSON + zstandard.ZstdCompressor().compress(messages)
+    raise ValueError(
+        f'Unknown history codec {codec!r}, expected one of {get_args(HistoryCodec)}'
+    )
+
+
+def decode_messages(stored: bytes | str) -> list[ModelMessage]:
+    """Decodes a stored row, whichever codec wrote it."""
+    tag = stored[:1]
+    if tag == _ZLIB_JSON:
+        data = zlib.decompress(stored[1:])
+    elif tag == _ZSTD_JSON:
+        if zstandard is None:
+            raise ImportError(
+                'Messages were stored with the zstd codec, '
+                'please install zstandard with `pip install zstandard`.'
+            )
+        data = zstandard.ZstdDecompressor().decompress(stored[1:])
+    else:
+        data = stored
+    # parsed straight from JSON into `ModelMessage`s, without building dicts first
+    return ModelMessagesTypeAdapter.validate_json(data)
+
+
 @dataclass
 class Database:
     """Rudimentary database to store chat messages in SQLite.
 
     The SQLite standard library package is synchronous, so we
-    use a thread pool executor to run queries asynchronously.
+    use thread pool executors to run queries asynchronously.
+
+    The database is in WAL mode, where readers don't block the writer or each
+    other: all writes go through one connection on one thread, and reads are
+    spread over `readers` read-only connections, each on its own thread
+    (`readers=0` sends reads through the writer too).
+
+    Messages are stored per conversation. Decoded messages are cached in memory
+    for the most recently used conversations, so each request only reads and
+    validates the rows added since the previous one. New rows are stored with
+    `codec` (see `encode_messages`); rows written with any codec stay readable.
     """
 
     con: sqlite3.Connection
     _loop: asyncio.AbstractEventLoop
     _executor: ThreadPoolExecutor
+    _readers: ThreadPoolExecutor | None = None
+    _reader_cons: list[sqlite3.Connection] = field(default_factory=list)
+    _reader_local: threading.local = field(default_factory=threading.local)
+    _codec: HistoryCodec = 'json'
+    _all_conversations_owned: bool = False
+    _history: OrderedDict[str, _HistoryCache] = field(default_factory=OrderedDict)
 
     @classmethod
     @asynccontextmanager
     async def connect(
-        cls, file: Path = THIS_DIR / '.chat_app_messages.sqlite'
+        cls,
+        file: Path = THIS_DIR / '.chat_app_messages.sqlite',
+        readers: int = 4,
+        codec: HistoryCodec = 'json',
     ) -> AsyncIterator[Database]:
+        if codec not in get_args(HistoryCodec):
+            raise ValueError(
+                f'Unknown history codec {codec!r}, '
+                f'expected one of {get_args(HistoryCodec)}'
+            )
+        if codec == 'zstd' and zstandard is None:
+            raise ImportError(
+                'Please install zstandard with `pip install zstandard` '
+                'to use the zstd codec.'
+            )
         with logfire.span('connect to DB'):
             loop = asyncio.get_event_loop()
             executor = ThreadPoolExecutor(max_workers=1)
             con = await loop.run_in_executor(executor, cls._connect, file)
-            slf = cls(con, loop, executor)
+            slf = cls(con, loop, executor, _codec=codec)
+            if readers:
+                # each reader thread opens its own connection when it starts
+                slf._readers = ThreadPoolExecutor(
+                    max_workers=readers,
+                    thread_name_prefix='chat-db-reader',
+                    initializer=slf._open_reader,
+                    initargs=(file,),
+                )
         try:
             yield slf
         finally:
+            if slf._readers is not None:
+                slf._readers.shutdown()
+                for reader in slf._reader_cons:
+                    reader.close()
             await slf._asyncify(con.close)
 
     @staticmethod
     def _connect(file: Path) -> sqlite3.Connection:
         con = sqlite3.connect(str(file))
         con = logfire.instrument_sqlite3(con)
-        cur = con.cursor()
-        cur.execute(
-            'CREATE TABLE IF NOT EXISTS messages (id INT PRIMARY KEY, message_list TEXT);'
-        )
-        con.commit()
+        # WAL is stored in the file, so the readers get it too;
+        # NORMAL is still crash-safe in WAL mode
+        con.execute('PRAGMA journal_mode=WAL')
+        con.execute('PRAGMA synchronous=NORMAL')
+        Database._migrate(con)
         return con
 
-    async def add_messages(self, messages: bytes):
+    def _open_reader(self, file: Path) -> None:
+        # read-only, so a stray write can't slip past the single writer;
+        # `check_same_thread=False` only so `connect` can close it at shutdown,
+        # it's otherwise only used by this thread
+        con = sqlite3.connect(
+            f'{file.resolve().as_uri()}?mode=ro', uri=True, check_same_thread=False
+        )
+        con = logfire.instrument_sqlite3(con)
+        self._reader_local.con = con
+        self._reader_cons.append(con)
+
+    @staticmethod
+    def _migrate(con: sqlite3.Connection) -> None:
+        """Brings the schema up to `SCHEMA_VERSION`, kept in `PRAGMA user_version`."""
+        (version,) = con.execute('PRAGMA user_version').fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        # sqlite3 only opens transactions implicitly for DML, so begin one explicitly:
+        # the migration either fully happens or not at all
+        con.execute('BEGIN')
+        with con:
+            if version < 1:
+                Database._migrate_to_conversations(con)
+            if version < 2:
+                # summaries of the older part of each conversation, see `HistoryPolicy`
+                con.execute(
+                    'CREATE TABLE summaries ('
+                    'conversation_id TEXT PRIMARY KEY, '
+                    'covered_messages INTEGER NOT NULL, '
+                    'summary TEXT NOT NULL);'
+                )
+            if version < 3:
+                # conversations with no browser yet, handed to the next visitor
+                # without a cookie
+                con.execute(
+                    'CREATE TABLE unowned_conversations ('
+                    'conversation_id TEXT PRIMARY KEY);'
+                )
+                # the history migrated to 'default' in version 1 has no cookie
+                # pointing at it
+                con.execute(
+                    'INSERT INTO unowned_conversations (conversation_id) '
+                    "SELECT 'default' WHERE EXISTS "
+                    "(SELECT 1 FROM messages WHERE conversation_id = 'default')"
+                )
+            con.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    @staticmethod
+    def _migrate_to_conversations(con: sqlite3.Connection) -> None:
+        """Version 1: messages are keyed by conversation."""
+        # version 0 had one global `messages (id INT PRIMARY KEY, message_list TEXT)`
+        # table; `id INT` isn't a rowid alias so it was always NULL, and rows are
+        # ordered by rowid instead
+        legacy = con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages'"
+        ).fetchone()
+        if legacy:
+            con.execute('ALTER TABLE messages RENAME TO messages_v0')
+        con.execute(
+            'CREATE TABLE messages ('
+            'id INTEGER PRIMARY KEY, '
+            'conversation_id TEXT NOT NULL, '
+            'message_list TEXT NOT NULL);'
+        )
+        # every query filters on the conversation and walks it in id order
+        con.execute(
+            'CREATE INDEX messages_conversation_id ON messages (conversation_id, id);'
+        )
+        if legacy:
+            # the old history didn't belong to anyone in particular,
+            # keep it under 'default'
+            # (version 3 hands it to the first browser that shows up without a cookie)
+            con.execute(
+                'INSERT INTO messages (conversation_id, message_list) '
+                "SELECT 'default', message_list FROM messages_v0 ORDER BY rowid"
+            )
+            con.execute('DROP TABLE messages_v0')
+
+    async def add_messages(self, conversation_id: str, messages: bytes):
         await self._asyncify(
             self._execute,
-            'INSERT INTO messages (message_list) VALUES (?);',
-            messages,
+            'INSERT INTO messages (conversation_id, message_list) VALUES (?, ?);',
+            conversation_id,
+            encode_messages(messages, self._codec),
             commit=True,
         )
-        await self._asyncify(self.con.commit)
 
-    async def get_messages(self) -> list[ModelMessage]:
-        c = await self._asyncify(
-            self._execute, 'SELECT message_list FROM messages order by id'
+    async def get_messages(self, conversation_id: str) -> list[ModelMessage]:
+        history = self._history.get(conversation_id)
+        if history is None:
+            history = self._history[conversation_id] = _HistoryCache()
+            if len(self._history) > MAX_CACHED_CONVERSATIONS:
+                self._history.popitem(last=False)
+        self._history.move_to_end(conversation_id)
+
+        rows = await self._read(
+            'SELECT id, message_list FROM messages '
+            'WHERE conversation_id = ? AND id > ? ORDER BY id',
+            conversation_id,
+            history.last_id,
+        )
+        for row_id, message_list in rows:
+            # a concurrent request may have already appended this row while we
+            # were waiting
+            if row_id > history.last_id:
+                history.messages.extend(decode_messages(message_list))
+                history.last_id = row_id
+        # a copy, so callers can't modify the cache
+        return list(history.messages)
+
+    async def claim_unowned_conversation(self) -> str | None:
+        """Hands out a conversation no browser has yet (at most once each), or None."""
+        if self._all_conversations_owned:
+            return None
+        conversation_id = await self._asyncify(self._claim_unowned_conversation)
+        if conversation_id is None:
+            # the table only ever shrinks, so stop asking
+            self._all_conversations_owned = True
+        return conversation_id
+
+    def _claim_unowned_conversation(self) -> str | None:
+        # runs on the single writer thread, so two browsers can't both claim the same
+        # conversation
+        row = self.con.execute(
+            'SELECT conversation_id FROM unowned_conversations LIMIT 1'
+        ).fetchone()
+        if row is None:
+            return None
+        with self.con:
+            self.con.execute(
+                'DELETE FROM unowned_conversations WHERE conversation_id = ?', row
+            )
+        return row[0]
+
+    async def get_summary(self, conversation_id: str) -> HistorySummary | None:
+        rows = await self._read(
+            'SELECT covered_messages, summary FROM summaries WHERE conversation_id = ?',
+            conversation_id,
+        )
+        return HistorySummary(*rows[0]) if rows else None
+
+    async def save_summary(self, conversation_id: str, summary: HistorySummary):
+        await self._asyncify(
+            self._execute,
+            'INSERT INTO summaries (conversation_id, covered_messages, summary) '
+            'VALUES (?, ?, ?) '
+            'ON CONFLICT (conversation_id) DO UPDATE '
+            'SET covered_messages = excluded.covered_messages, '
+            'summary = excluded.summary '
+            # two requests may summarize at once, keep whichever covers more
+            'WHERE excluded.covered_messages > summaries.covered_messages;',
+            conversation_id,
+            summary.covered_messages,
+            summary.text,
+            commit=True,
         )
-        rows = await self._asyncify(c.fetchall)
-        messages: list[ModelMessage] = []
-        for row in rows:
-            messages.extend(ModelMessagesTypeAdapter.validate_json(row[0]))
-        return messages
 
     def _execute(
         self, sql: LiteralString, *args: Any, commit: bool = False
@@ -209,6 +659,21 @@ class Database:
             self.con.commit()
         return cur
 
+    async def _read(self, sql: LiteralString, *args: Any) -> list[Any]:
+        """Fetches all rows of a query, on a reader connection if there are any."""
+        if self._readers is None:
+            return await self._asyncify(self._fetchall, self.con, sql, args)
+        return await self._loop.run_in_executor(
+            self._readers, self._fetchall, None, sql, args
+        )
+
+    def _fetchall(
+        self, con: sqlite3.Connection | None, sql: LiteralString, args: tuple[Any, ...]
+    ) -> list[Any]:
+        # the cursor is consumed on the thread that made it, in the same executor call
+        con = con or self._reader_local.con
+        return con.execute(sql, args).fetchall()
+
     async def _asyncify(
         self, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs
     ) -> R:
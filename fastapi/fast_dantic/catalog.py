@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import threading
+from typing import Optional
+
+# event: SQLAlchemy's hook system. It lets us run our own code whenever something happens in a Session (like a commit).
+from sqlalchemy import event
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_engine
+from models import Product
+
+# ==========================================
+# In-Memory Product Catalog Cache
+# ==========================================
+# The storefront asks for the catalog on every page load, but the products almost never change.
+# Rather than opening a session and querying SQLite every time, we load the catalog ONCE and keep:
+#   * a SKU -> JSON bytes index, for `GET /products/{sku}`
+#   * the whole catalog already serialized as one JSON blob, for `GET /products`
+#   * an ETag (a fingerprint of that JSON), so browsers can ask "has it changed?" and get an empty
+#     `304 Not Modified` back when it hasn't
+# Whenever a Product is added, changed or deleted through a Session, the cache is thrown away and
+# rebuilt on the next request. The rebuild goes through the async engine, so it never blocks the event loop.
+
+
+def make_etag(body: bytes) -> str:
+    # ETags are quoted strings; a short hash of the body is plenty to tell versions apart
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class ProductCatalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Only one reload at a time: requests that find the cache empty meanwhile wait for it instead of querying too
+        self._reload_lock = asyncio.Lock()
+        self._loaded = False
+        # Bumped by every invalidation, so a reload that raced with a product change doesn't count as up to date
+        self._generation = 0
+        self.products: list[dict] = []
+        self.by_sku: dict[str, bytes] = {}
+        self.json_blob = b"[]"
+        self.etag = make_etag(self.json_blob)
+
+    async def load(self):
+        """(Re)reads every product from the database and pre-serializes it."""
+        generation = self._generation
+        async with AsyncSession(async_engine) as session:
+            products = (await session.exec(select(Product).order_by(Product.id))).all()
+            by_sku = {product.sku: product.model_dump_json().encode() for product in products}
+            dicts = [product.model_dump() for product in products]
+
+        json_blob = b"[" + b",".join(by_sku.values()) + b"]"
+        with self._lock:
+            self.products = dicts
+            self.by_sku = by_sku
+            self.json_blob = json_blob
+            self.etag = make_etag(json_blob)
+            self._loaded = generation == self._generation
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._loaded = False
+
+    async def ensure_loaded(self) -> "ProductCatalog":
+        if not self._loaded:
+            async with self._reload_lock:
+                if not self._loaded:
+                    await self.load()
+        return self
+
+    async def get(self, sku: str) -> Optional[bytes]:
+        return (await self.ensure_loaded()).by_sku.get(sku)
+
+
+product_catalog = ProductCatalog()
+
+
+# Invalidate the cache after any commit that touched a Product.
+# `before_flush` sees exactly which objects are being written; `after_commit` fires once they are safely saved.
+@event.listens_for(Session, "before_flush")
+def _track_product_writes(session, flush_context, instances):
+    if any(isinstance(obj, Product) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["products_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog(session):
+    if session.info.pop("products_changed", False):
+        product_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_writes(session):
+    # Nothing was saved, so the cached catalog is still correct
+    session.info.pop("products_changed", None)
+
+
+# ==========================================
+# Catalog Prompt for the AI Agents
+# ==========================================
+# Both AI agents need the current prices in their system prompt. Building that text from the cache
+# (instead of from `dummy_data.py` at import time) means the agents always quote what the database says.
+#
+# The text only changes when the catalog does, and it is "versioned" by its own hash. That hash
+# feeds the LLM response cache key, so a price change can never be answered from a stale cached reply.
+# It is rebuilt incrementally: only products whose name or price changed are re-formatted.
+#
+# LLM providers (e.g. OpenAI) cache the longest *identical prefix* of recent prompts and bill those
+# tokens cheaper and faster. So the catalog block is sorted by SKU (stable order) and placed FIRST in
+# every system prompt, before anything agent-specific, and the changing user text always comes last.
+
+
+def format_catalog_line(product: dict) -> str:
+    return f"- {product['item_name']} (SKU: {product['sku']}): ${product['price']} each"
+
+
+class CatalogPrompt:
+    def __init__(self, catalog: ProductCatalog):
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        # sku -> ((item_name, price), formatted line), reused by the next rebuild when nothing changed
+        self._lines: dict[str, tuple[tuple, str]] = {}
+        self._source_etag: Optional[str] = None
+        self.text = ""
+        self.version = ""
+
+    async def current(self) -> "CatalogPrompt":
+        """Brings the prompt up to date with the product cache (a no-op while the catalog hasn't changed)."""
+        catalog = await self._catalog.ensure_loaded()
+        # Read the ETag before the products: if a reload sneaks in between, the ETags won't match next time
+        etag = catalog.etag
+        if etag != self._source_etag:
+            with self._lock:
+                if etag != self._source_etag:
+                    self._rebuild(catalog.products, etag)
+        return self
+
+    def _rebuild(self, products: list[dict], etag: str):
+        lines = {}
+        for product in sorted(products, key=lambda p: p["sku"]):
+            fields = (product["item_name"], product["price"])
+            cached = self._lines.get(product["sku"])
+            lines[product["sku"]] = cached if cached and cached[0] == fields else (fields, format_catalog_line(product))
+
+        body = "\n".join(line for _, line in lines.values())
+        version = hashlib.sha256(body.encode()).hexdigest()[:12]
+        self._lines = lines
+        self.text = f"PRODUCT CATALOG (version {version}):\n{body}\n\n"
+        self.version = version
+        self._source_etag = etag
+
+
+catalog_prompt = CatalogPrompt(product_catalog)
@@ -0,0 +1,176 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+# insert(): SQLAlchemy's bulk INSERT statement. Passing it a list of dictionaries runs ONE "executemany" instead of one query per row.
+# tuple_(): Lets us compare several columns at once, e.g. `(order_id, id) > (5, 42)`.
+from sqlalchemy import insert, tuple_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from models import Order, OrderItem, Product
+from schemas import CustomerOrder
+
+# ==========================================
+# Bulk Database Writes
+# ==========================================
+# Saving orders one at a time (`add` -> `commit` -> `refresh`) costs several round-trips to SQLite per order,
+# and every commit forces the data to be flushed to disk (an "fsync"). For a batch of 5,000 orders that's
+# over 10,000 trips. The helpers below write a whole batch with just two bulk INSERTs inside one transaction.
+
+
+def bulk_insert_orders(session: Session, orders: Sequence[CustomerOrder]) -> list[int]:
+    """
+    Inserts every order and all of their line items, returning the new `Order.id` primary keys (in input order).
+    This does NOT commit: the caller decides where the transaction ends, so the whole batch succeeds or fails together.
+    """
+    if not orders:
+        return []
+
+    # 1. Insert all parent orders at once.
+    # `RETURNING id` hands back the auto-generated primary keys, so we never need a `refresh()` per row.
+    # `sort_by_parameter_order=True` guarantees the ids come back in the same order as our `orders` list.
+    order_ids = session.exec(
+        insert(Order).returning(Order.id, sort_by_parameter_order=True),
+        params=[
+            {
+                "order_id": order.order_id,
+                "customer_name": order.customer_name,
+                "email": order.email,
+                "price": order.price,
+                "is_priority": order.is_priority,
+            }
+            for order in orders
+        ],
+    ).scalars().all()
+
+    # 2. Insert all child line-items at once, each one linked to its parent's new primary key
+    item_rows = [
+        {
+            "order_id": db_order_id,
+            "product_id": item.product_id,
+            "item_name": item.item_name,
+            "sku": item.sku,
+            "quantity": item.quantity,
+            "price": item.price,
+            "image_url": item.image_url,
+        }
+        for db_order_id, order in zip(order_ids, orders)
+        for item in order.items
+    ]
+    if item_rows:
+        session.exec(insert(OrderItem), params=item_rows)
+
+    return list(order_ids)
+
+
+# ==========================================
+# Keyset (Cursor) Pagination
+# ==========================================
+# "Offset" paging (`LIMIT 50 OFFSET 100000`) makes the database walk past and throw away every
+# skipped row, so page 2,000 is far slower than page 1. "Keyset" paging instead remembers the
+# last row of the previous page and asks for rows AFTER it (`WHERE sku > 'SL-001'`), which an
+# index can jump to directly. Every page costs the same, however deep you go.
+#
+# The "cursor" we hand to the client is just that last row's sort key, packed into an opaque string.
+
+
+def encode_cursor(*values: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Unpacks a cursor made by `encode_cursor`. Raises ValueError if it has been tampered with."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # Timestamps are saved in UTC, so a filter with no timezone (e.g. "2024-05-01T00:00") is read as UTC too
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def order_filters(
+    priority: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> list:
+    """Turns the optional /orders query parameters into SQL WHERE conditions (so the database does the filtering)."""
+    conditions = []
+    if priority is not None:
+        conditions.append(Order.is_priority == priority)
+    if created_after is not None:
+        conditions.append(Order.created_at >= _as_utc(created_after))
+    if created_before is not None:
+        conditions.append(Order.created_at < _as_utc(created_before))
+    if min_price is not None:
+        conditions.append(Order.price >= min_price)
+    if max_price is not None:
+        conditions.append(Order.price <= max_price)
+    return conditions
+
+
+def orders_query(conditions: list):
+    """All matching orders, with their items eagerly loaded, in keyset order."""
+    # `order_id` isn't unique, so the primary key breaks ties and gives every row a unique position.
+    # SQLite's index on order_id already stores the row id alongside it, so this ordering is index-backed.
+    return (
+        select(Order)
+        .where(*conditions)
+        .options(selectinload(Order.items))
+        .order_by(Order.order_id, Order.id)
+    )
+
+
+def page_orders(session: Session, limit: int, cursor: Optional[str], conditions: list) -> tuple[list[Order], Optional[str]]:
+    """Returns one page of orders plus the cursor for the next page (None on the last page)."""
+    statement = orders_query(conditions)
+    if cursor:
+        last_order_id, last_id = decode_cursor(cursor, 2)
+        statement = statement.where(tuple_(Order.order_id, Order.id) > tuple_(last_order_id, last_id))
+
+    # Ask for one extra row: if it exists, there is another page after this one
+    orders = session.exec(statement.limit(limit + 1)).all()
+    if len(orders) <= limit:
+        return list(orders), None
+    last = orders[limit - 1]
+    return list(orders[:limit]), encode_cursor(last.order_id, last.id)
+
+
+def product_filters(min_price: Optional[float] = None, max_price: Optional[float] = None) -> list:
+    conditions = []
+    if min_price is not None:
+        conditions.append(Product.price >= min_price)
+    if max_price is not None:
+        conditions.append(Product.price <= max_price)
+    return conditions
+
+
+def page_products(session: Session, limit: Optional[int], cursor: Optional[str], conditions: list) -> tuple[list[Product], Optional[str]]:
+    """Returns matching products; when `limit` or `cursor` is given, one page ordered by their unique, indexed SKU."""
+    statement = select(Product).where(*conditions)
+    if limit is None and cursor is None:
+        # No paging requested: the whole (small) catalog, in its original order
+        return list(session.exec(statement).all()), None
+
+    statement = statement.order_by(Product.sku)
+    if cursor:
+        (last_sku,) = decode_cursor(cursor, 1)
+        statement = statement.where(Product.sku > last_sku)
+    if limit is None:
+        return list(session.exec(statement).all()), None
+
+    products = session.exec(statement.limit(limit + 1)).all()
+    if len(products) <= limit:
+        return list(products), None
+    return list(products[:limit]), encode_cursor(products[limit - 1].sku)
@@ -1,4 +1,12 @@
+import os
+from typing import Literal
+
+from pydantic import BaseModel
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # ==========================================
 # Database Configuration
@@ -9,16 +17,100 @@ from sqlmodel import SQLModel, create_engine, Session
 sqlite_file_name = "database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
-# 2. Create the Engine. 
-# The Engine is the core interface to the database. "check_same_thread": False is needed 
-# for SQLite specifically when used with FastAPI so multiple web requests can access the DB.
-connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+# 2. Choose a Performance Profile.
+# Out of the box SQLite is tuned for safety on ancient hardware: every commit rewrites a rollback journal
+# and waits for the disk twice, and writers lock out readers. These "PRAGMA" settings change that:
+#   * journal_mode=WAL     -> readers no longer block writers (and vice versa); commits just append to a log file
+#   * synchronous=NORMAL   -> with WAL this is still corruption-safe, but skips most of the slow disk flushes
+#   * mmap_size            -> lets SQLite read the file through memory-mapping instead of read() calls
+#   * cache_size           -> more pages kept in memory (a negative number means "this many KiB")
+#   * busy_timeout         -> a writer that finds the DB locked waits up to N ms instead of failing immediately
+# The pool settings decide how many connections SQLAlchemy keeps open and ready to hand out.
+class SQLiteProfile(BaseModel):
+    journal_mode: Literal["DELETE", "WAL"] = "WAL"
+    synchronous: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64 * 1024
+    busy_timeout_ms: int = 5_000
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30
+
+    def pragmas(self) -> list[str]:
+        return [
+            # busy_timeout goes first, so the other PRAGMAs also wait politely if the file is locked
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            f"PRAGMA cache_size={self.cache_size}",
+        ]
+
+    def pool_args(self) -> dict:
+        return {"pool_size": self.pool_size, "max_overflow": self.max_overflow, "pool_timeout": self.pool_timeout}
+
+
+PROFILES = {
+    "performance": SQLiteProfile(),
+    # SQLite's own defaults, for comparison (see benchmarks/sqlite_write_load.py)
+    "safe": SQLiteProfile(journal_mode="DELETE", synchronous="FULL", mmap_size=0, cache_size=-2000, pool_size=5, max_overflow=10),
+}
+
+# Pick a profile with the FAST_DANTIC_DB_PROFILE environment variable (defaults to "performance")
+db_profile = PROFILES[os.environ.get("FAST_DANTIC_DB_PROFILE", "performance")]
+
+
+def apply_profile(sync_engine: Engine, profile: SQLiteProfile):
+    # PRAGMAs only last as long as one connection, so we run them every time the pool opens a new one
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in profile.pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def make_engine(url: str, profile: SQLiteProfile) -> Engine:
+    # The Engine is the core interface to the database. "check_same_thread": False is needed 
+    # for SQLite specifically when used with FastAPI so multiple web requests can access the DB.
+    new_engine = create_engine(url, connect_args={"check_same_thread": False}, **profile.pool_args())
+    apply_profile(new_engine, profile)
+    return new_engine
+
+
+def make_async_engine(url: str, profile: SQLiteProfile) -> AsyncEngine:
+    new_engine = create_async_engine(url, **profile.pool_args())
+    # Event hooks live on the sync engine that every AsyncEngine wraps
+    apply_profile(new_engine.sync_engine, profile)
+    return new_engine
+
+
+# 3. Create the Engine.
+engine = make_engine(sqlite_url, db_profile)
+
+# 4. Create the Async Engine.
+# Our `async def` routes run on the event loop; a normal (blocking) query there freezes EVERY other request
+# until it finishes. The async engine talks to the same database.db through the `aiosqlite` driver, which runs
+# each query in a background thread, so routes can `await` it and the event loop stays free meanwhile.
+# (Requires: pip install aiosqlite greenlet)
+async_sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
+async_engine = make_async_engine(async_sqlite_url, db_profile)
 
 def create_db_and_tables():
     # This reads all classes that inherit from SQLModel (like Product, Order) 
     # and automatically creates the corresponding SQL tables if they don't exist yet out of thin air!
     SQLModel.metadata.create_all(engine)
+    migrate_db()
+
+def migrate_db():
+    # `create_all` only creates MISSING tables; it never adds new columns to a table that already exists.
+    # This tiny migration adds columns introduced after the first release to older `database.db` files.
+    order_columns = {column["name"] for column in inspect(engine).get_columns("order")}
+    with engine.begin() as connection:
+        if "created_at" not in order_columns:
+            # Orders saved before this column existed simply have no timestamp (NULL)
+            connection.execute(text('ALTER TABLE "order" ADD COLUMN created_at DATETIME'))
+            connection.execute(text('CREATE INDEX IF NOT EXISTS ix_order_created_at ON "order" (created_at)'))
 
 def get_session():
     # A Session is a temporary connection to the database. 
@@ -26,3 +118,9 @@ def get_session():
     # At the end of the web request, the `with` block closes the connection automatically securely.
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # The async twin of get_session(), for `async def` routes: `session: AsyncSession = Depends(get_async_session)`.
+    # expire_on_commit=False keeps objects readable after commit without another (awaited) trip to the database.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
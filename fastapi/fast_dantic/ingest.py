@@ -0,0 +1,125 @@
+import codecs
+import os
+from typing import Any, AsyncIterator, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from json_array import JSONArrayParser
+
+# ==========================================
+# Streaming Bulk Ingest
+# ==========================================
+# `POST /process-orders/` lets FastAPI read the WHOLE request body into memory, decode all of it,
+# and build every CustomerOrder before our code runs. A 500 MB upload means gigabytes of RAM, and
+# nothing is written until the last byte has arrived.
+#
+# `POST /process-orders/stream` instead reads the body as it arrives, pulls the orders out of the
+# JSON array one at a time, and validates + inserts them in fixed-size chunks. Memory use is bounded
+# by one chunk (not the upload), and the first chunk is saved while the rest is still uploading.
+
+# Uploads bigger than this are refused with `413 Payload Too Large` by IngestSizeLimit (set FAST_DANTIC_MAX_INGEST_BYTES to change it)
+MAX_INGEST_BYTES = int(os.environ.get("FAST_DANTIC_MAX_INGEST_BYTES", 256 * 1024 * 1024))
+
+# How many orders are validated and inserted together
+INGEST_CHUNK_ORDERS = 1_000
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class IngestSizeLimit:
+    """
+    ASGI middleware that refuses uploads to `paths` over `max_bytes` (default: MAX_INGEST_BYTES) with a 413.
+
+    It has to sit in front of the app: FastAPI reads and parses the whole body before any dependency or
+    endpoint runs, so a check in there would only fire after the memory was already spent. A declared
+    Content-Length that is too big is refused before a single byte is read; chunked uploads (which have
+    no length) are counted as they arrive and cut off as soon as they pass the limit.
+    """
+
+    def __init__(self, app: ASGIApp, paths: tuple[str, ...], max_bytes: Optional[int] = None):
+        self.app = app
+        self.paths = paths
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        max_bytes = self.max_bytes or MAX_INGEST_BYTES
+        too_large = JSONResponse({"detail": f"Request body is larger than {max_bytes} bytes"}, status_code=413)
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    raise BodyTooLarge(f"Request body is larger than {max_bytes} bytes")
+            return message
+
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                # Past the limit, only a 413 from the app itself (e.g. with `saved_orders`) goes out;
+                # FastAPI may have turned our exception into a "400 error parsing the body" instead
+                if exceeded and message["status"] != 413:
+                    return
+                response_started = True
+            elif not response_started:
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except BodyTooLarge:
+            if response_started:
+                raise
+        if exceeded and not response_started:
+            await too_large(scope, receive, send)
+
+
+async def _limited_text(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[str]:
+    """Decodes the byte chunks to text, failing as soon as more than `max_bytes` have arrived."""
+    # An incremental decoder copes with a multi-byte character (like "é") split across two chunks
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            # IngestSizeLimit normally stops the upload first; this keeps the helper safe to use on its own
+            raise BodyTooLarge(f"Request body is larger than {max_bytes} bytes")
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    decoder.decode(b"", final=True)
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes], max_bytes: Optional[int] = None) -> AsyncIterator[Any]:
+    """
+    Yields the elements of a JSON array one by one, as the bytes arrive.
+    Raises ValueError if the body isn't a JSON array or one element is longer than MAX_ELEMENT_CHARS
+    (the endpoint turns both into a 400), and BodyTooLarge past `max_bytes` (default: MAX_INGEST_BYTES).
+    """
+    parser = JSONArrayParser()
+    async for text in _limited_text(chunks, max_bytes or MAX_INGEST_BYTES):
+        parser.feed(text)
+        for value in parser.values():
+            yield value
+        if parser.closed:
+            return
+    parser.close()
+    for value in parser.values():
+        yield value
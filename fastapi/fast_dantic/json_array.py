@@ -0,0 +1,170 @@
+import json
+from typing import Any, Iterator
+
+# ==========================================
+# Incremental JSON Array Parser
+# ==========================================
+# Pulls the elements out of a JSON array while its text is still arriving, so a huge array never
+# has to be held in memory as a whole. It serves the streaming upload (`ingest.py`), and the data
+# cleaner's file reader (`data_cleaner/order_stream.py`) uses the same code.
+
+# The longest single element we are willing to wait for. Broken JSON is reported as soon as we see it,
+# but a string whose closing quote never comes looks just like one that is still arriving; without a
+# cap it would make us buffer the whole rest of the input.
+MAX_ELEMENT_CHARS = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+# Python's json module also accepts NaN and (-)Infinity
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+
+def _skip(buffer: str, pos: int, chars: str) -> int:
+    """Returns the first position in `buffer` at or after `pos` that is not in `chars`."""
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _cut_off(buffer: str, error: json.JSONDecodeError) -> bool:
+    """Whether `error` only happened because `buffer` stops too early, so more text could still fix it."""
+    rest = buffer[error.pos:]
+    if not rest or error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        # "\u00" waiting for its last two hex digits
+        return len(rest) <= 5 and all(char in "0123456789abcdefABCDEF" for char in rest[1:])
+    # A number ("2.", "1e-") or a literal ("tr", "-Inf") that stops halfway
+    return _skip(rest, 0, _NUMBER_CHARS) == len(rest) or any(literal.startswith(rest) for literal in _LITERALS)
+
+
+class JSONArrayParser:
+    """
+    Pulls the elements out of a JSON array whose text arrives in pieces.
+
+    `feed()` each piece of text as it is read (and `close()` once there is no more), then take
+    the elements that are now complete from `values()`. The parser never reads anything itself,
+    so the same code serves a file reader and a streaming request body.
+
+    An element longer than `max_element_chars` is an error, and error messages give the position
+    in the whole input, not in the current piece.
+    """
+
+    def __init__(self, max_element_chars: int = MAX_ELEMENT_CHARS):
+        self.max_element_chars = max_element_chars
+        self._buffer = ""  # the text being parsed; everything before `_pos` is done with
+        self._pos = 0
+        self._offset = 0  # where `_buffer` starts in the whole input
+        # Text fed since the buffer was last put together. Joining it only when we try to parse
+        # again (see `_retry_at`) keeps a long, cut-off element from being copied on every feed.
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._retry_at = 0
+        self._eof = False
+        self._opened = False  # seen the '['
+        self._after_value = False  # the next thing must be ',' or ']'
+        self._after_comma = False  # the next thing must be an element
+        self.closed = False  # seen the ']'
+
+    def feed(self, text: str):
+        self._pending.append(text)
+        self._pending_chars += len(text)
+
+    def close(self):
+        """No more text is coming: whatever is left must now parse (or is an error)."""
+        self._eof = True
+
+    def _error(self, message: str, pos: int) -> ValueError:
+        return ValueError(f"{message} (at character {self._offset + pos})")
+
+    def _take_pending(self) -> bool:
+        """
+        Drops the text already parsed and appends the pending text to what is left, if it is time to
+        parse again. Returns False while we're still waiting for more text.
+        """
+        unparsed = len(self._buffer) - self._pos + self._pending_chars
+        if not self._eof and unparsed < min(self._retry_at, self.max_element_chars + 1):
+            return False
+        if self._pending:
+            self._offset += self._pos
+            self._buffer = self._buffer[self._pos:] + "".join(self._pending)
+            self._pos = 0
+            self._pending.clear()
+            self._pending_chars = 0
+        return True
+
+    def _wait(self, pos: int):
+        """The element at `pos` is cut off by the end of the buffer: keep it until more text arrives."""
+        self._pos = pos
+        waiting = len(self._buffer) - pos
+        if waiting > self.max_element_chars:
+            raise self._error(f"An array element is longer than {self.max_element_chars} characters", pos)
+        # Only parse it again once the text has doubled, so the total work stays linear in its length
+        self._retry_at = 2 * waiting
+
+    def values(self) -> Iterator[Any]:
+        """Yields every element that is complete in the text fed so far. Raises ValueError for bad JSON."""
+        for value, _ in self._elements():
+            yield value
+
+    def raw_values(self) -> Iterator[str]:
+        """Like `values()`, but yields the JSON text of each element, e.g. to validate it somewhere else."""
+        for _, text in self._elements():
+            yield text
+
+    def _elements(self) -> Iterator[tuple[Any, str]]:
+        if not self._take_pending():
+            return
+        buffer = self._buffer
+        if not self._opened:
+            pos = _skip(buffer, self._pos, _WHITESPACE)
+            self._pos = pos
+            if pos == len(buffer):
+                if self._eof:
+                    raise ValueError("Input is empty; expected a JSON array")
+                return
+            if buffer[pos] != "[":
+                raise ValueError("Input must be a JSON array")
+            self._pos = pos + 1
+            self._opened = True
+
+        while not self.closed:
+            pos = self._pos = _skip(buffer, self._pos, _WHITESPACE)
+            if pos == len(buffer):
+                if self._eof:
+                    raise self._error("Unexpected end of input: JSON array was never closed", pos)
+                self._retry_at = 0
+                return
+            if self._after_value:
+                if buffer[pos] == ",":
+                    self._pos = pos + 1
+                    self._after_value = False
+                    self._after_comma = True
+                    continue
+                if buffer[pos] != "]":
+                    raise self._error("Invalid JSON: expected ',' or ']' after an element", pos)
+            if buffer[pos] == "]" and not self._after_comma:
+                self._pos = pos + 1
+                self.closed = True
+                return
+
+            try:
+                # raw_decode parses ONE value starting at `pos` and tells us where it ended
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Only an element cut off by the end of the buffer is worth waiting for
+                if self._eof or not _cut_off(buffer, e):
+                    raise self._error(f"Invalid JSON: {e.msg}", e.pos) from e
+                self._wait(pos)
+                return
+            if not self._eof and _skip(buffer, end, _NUMBER_CHARS) == len(buffer):
+                # A number cut off by the end of the buffer parses as a shorter number ("123" of
+                # "12345", "1" of "1.5"), so a number only counts once we've seen what follows it
+                self._wait(pos)
+                return
+
+            yield value, buffer[pos:end]
+            self._pos = end
+            self._after_value = True
+            self._after_comma = False
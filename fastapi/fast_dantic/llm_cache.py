@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Union
+
+from pydantic_ai import Agent
+from pydantic_ai.models import Model
+
+from metrics import timed
+
+# ==========================================
+# LLM Response Cache
+# ==========================================
+# Every `/extract-order` call costs a round-trip to the LLM: seconds of latency and real money.
+# Yet shoppers often send the exact same text again (a retried checkout, a double-click, a page refresh).
+# This cache remembers the structured answer for each prompt, so a repeat is answered instantly.
+#
+# The cache key is a hash ("content address") of everything that can change the answer:
+#   * the model (e.g. "openai:gpt-4o")
+#   * the agent's system prompt (so a new catalog or new instructions never return a stale answer)
+#   * the user's text, normalized so "3  routers " and "3 routers" count as the same request
+#
+# It also does "single-flight" coalescing: if 10 identical requests arrive while the first one is
+# still waiting for the LLM, they all share that ONE in-flight call instead of making 10.
+
+
+def normalize_prompt(text: str) -> str:
+    # NFKC folds look-alike Unicode characters together; split/join collapses all runs of whitespace
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def model_id(model: Union[Model, str]) -> str:
+    if isinstance(model, str):
+        return model
+    return f"{model.system}:{model.model_name}"
+
+
+def response_key(model: Union[Model, str], system_prompt: str, user_prompt: str) -> str:
+    system_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+    key = "\x00".join([model_id(model), system_hash, normalize_prompt(user_prompt)])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 15 * 60, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._clock = clock
+        # key -> (expires_at, output); ordered from least to most recently used
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # key -> the shared LLM call for that key, while it is still running
+        self._in_flight: dict[str, asyncio.Task] = {}
+        # shared call -> how many callers are waiting on it; and the calls that must finish even if nobody waits
+        self._waiters: dict[asyncio.Task, int] = {}
+        self._pinned: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_run(self, key: str, call: Callable[[], Awaitable[Any]], cancel_if_abandoned: bool = False) -> Any:
+        """
+        Returns the cached output for `key`, joins an identical call already in flight, or starts `call()`.
+
+        With `cancel_if_abandoned=True`, cancelling this caller also cancels the shared call, unless another
+        caller is still waiting on it or joined without that flag.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, output = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return output
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._finish, key))
+        else:
+            self.coalesced += 1
+        if not cancel_if_abandoned:
+            self._pinned.add(task)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # shield(): if this client hangs up, the shared call keeps going for everyone else waiting on it
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done() and task not in self._pinned:
+                    task.cancel()  # nobody wants this answer any more
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        self._pinned.discard(task)
+        # Failed calls are never cached: the next request gets a fresh attempt
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = (self._clock() + self.ttl_s, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # evict the least recently used answer
+
+
+llm_response_cache = LLMResponseCache()
+
+
+async def run_cached(agent: Agent, system_prompt: str, user_prompt: str, cancel_if_abandoned: bool = False) -> Any:
+    """
+    `agent.run(user_prompt).output`, served from `llm_response_cache` whenever possible.
+
+    See `LLMResponseCache.get_or_run` for `cancel_if_abandoned`.
+    """
+    model = agent.model
+
+    async def call():
+        with timed("llm_call"):
+            result = await agent.run(user_prompt, model=model)
+        return result.output
+
+    key = response_key(model, system_prompt, user_prompt)
+    return await llm_response_cache.get_or_run(key, call, cancel_if_abandoned)
@@ -1,17 +1,36 @@
 # logfire: A modern observability tool by the creators of Pydantic. It automatically tracks API requests and LLM calls.
 import logfire
 
+# asyncio: Python's built-in toolkit for running many waiting tasks (like LLM calls) at the same time.
+import asyncio
+
 # asynccontextmanager: A Python utility that lets us run setup code *before* the server starts and teardown code *after* it stops.
-from contextlib import asynccontextmanager
+# AsyncExitStack: Enters an `async with` in one place and exits it later, so we can time just the entering.
+from contextlib import AsyncExitStack, asynccontextmanager
 
 # FastAPI core tools. FastAPI is the web framework, Body lets us extract JSON from requests, and Depends handles dependency injection (like DB sessions).
-from fastapi import FastAPI, Body, Depends, HTTPException
+from fastapi import FastAPI, Body, Depends, HTTPException, Query, Request, Response
 
 # CORSMiddleware: Tells the backend which frontends (like localhost:3000) are allowed to securely talk to it.
 from fastapi.middleware.cors import CORSMiddleware
 
+# StreamingResponse: Sends the response body to the client piece by piece, as a generator produces it. PlainTextResponse: Sends plain text (for /metrics).
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+# os: Reads environment variables, like which LLM model to use.
+import os
+
 # List: Lets us strictly define Python arrays (e.g., List[Product]) for type hinting and validation.
-from typing import List
+from typing import List, Optional, Union
+
+# datetime: Python's date + time type. FastAPI parses ISO strings like "2024-05-01T00:00:00Z" from query params into it.
+from datetime import datetime
+
+# json: Python's built-in JSON encoder, used to format server-sent events.
+import json
+
+# TypeAdapter: Lets Pydantic validate/serialize types that aren't models themselves, like a whole List[OrderRead].
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 # pydantic_ai.Agent: The core class that wraps LLMs (like GPT-4) and strictly enforces that their output matches our Pydantic schemas.
 from pydantic_ai import Agent
@@ -19,10 +38,22 @@ from pydantic_ai import Agent
 # SQLModel components. Session represents an active connection to the database, select is used to write SQL queries in pure Python.
 from sqlmodel import Session, select
 
+# AsyncSession: The awaitable version of Session. Used by our `async def` routes so database calls don't block the server.
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# selectinload: Tells SQLAlchemy to load a relationship (like order.items) for many rows with one extra query.
+from sqlalchemy.orm import selectinload
+
 # Local imports
-from database import engine, get_session, create_db_and_tables
+from database import engine, async_engine, get_session, get_async_session, create_db_and_tables
 from models import Product, Order, OrderItem
-from schemas import CustomerOrder, OrderProcessSummary, SolutionProposal
+from catalog import catalog_prompt, make_etag, product_catalog
+from crud import bulk_insert_orders, order_filters, page_orders, page_products, product_filters
+from ingest import INGEST_CHUNK_ORDERS, BodyTooLarge, IngestSizeLimit, iter_json_array
+from llm_cache import run_cached
+from metrics import TimedRoute, stage_metrics, stage_timer, timed
+from write_queue import AckMode, QueueFull, order_write_queue
+from schemas import BatchExtractionRequest, CustomerOrder, ExtractionResult, OrderProcessSummary, OrderRead, RecommendedProduct, SolutionProposal, SolutionProposalDraft
 from dummy_data import fake_products_db
 
 # ==========================================
@@ -44,18 +75,33 @@ async def lifespan(app: FastAPI):
                 session.add(db_product)
             session.commit()
             print("Database seeded with mock B2B enterprise AI agents!")
+
+    # Load the product catalog into memory once, so storefront requests don't need the database
+    await product_catalog.load()
+
+    # Start the background writer for /clean-order (only if FAST_DANTIC_WRITE_BEHIND=1)
+    if order_write_queue.settings.enabled:
+        order_write_queue.start()
             
     yield
-    # Any shutdown logic would go here, after the 'yield'
+    # Shutdown logic goes here, after the 'yield': save any orders still queued, then close the async engine's connections cleanly
+    await order_write_queue.stop()
+    await async_engine.dispose()
 
 app = FastAPI(title="Real-World Order Processor API", lifespan=lifespan)
 
+# Every route below is created as a TimedRoute, which records per-stage latencies for GET /metrics
+app.router.route_class = TimedRoute
+
 # Configure Logfire for full stack observability
 # This gives you an amazing dashboard to see all incoming requests and LLM traces
 logfire.configure()
 logfire.instrument_fastapi(app)
 logfire.instrument_pydantic()
 
+# Refuse oversized bulk uploads before anything reads them (added before CORS, so a 413 still gets CORS headers)
+app.add_middleware(IngestSizeLimit, paths=("/process-orders/", "/process-orders/stream"))
+
 # Configure CORS so the Next.js frontend can communicate with this API
 origins = [
     "http://localhost:3000",
@@ -75,44 +121,140 @@ app.add_middleware(
 # ==========================================
 # Each function decorated with @app.get, @app.post, etc. becomes an API endpoint.
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Per-stage latency histograms (body parse, validation, DB insert, commit, LLM call, serialization)
+    for every route, in the Prometheus text format. Point a Prometheus scrape job at this URL.
+    """
+    return PlainTextResponse(stage_metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Paginated responses carry the cursor for the next page in this header (it is absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """
+    Sends pre-serialized JSON with an ETag. If the browser already has this exact version
+    (it sends the ETag back in `If-None-Match`), we reply `304 Not Modified` with no body at all.
+    """
+    # `no-cache` means "you may keep a copy, but check with us (using the ETag) before reusing it"
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/products")
-async def get_products(session: Session = Depends(get_session)):
+async def get_products(
+    request: Request,
+    response: Response,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
     """
-    Retrieve all available products from the database for the frontend storefront grid.
+    Retrieve all available products for the frontend storefront grid.
+
+    The full, unfiltered catalog is served straight from the in-memory `product_catalog`
+    (already serialized to JSON, with an ETag), so repeat storefront loads don't touch the database at all.
     
-    The pattern `session: Session = Depends(get_session)` is called Dependency Injection.
-    FastAPI will automatically call `get_session()`, open a database connection, pass it in 
+    The pattern `session: AsyncSession = Depends(get_async_session)` is called Dependency Injection.
+    FastAPI will automatically call `get_async_session()`, open a database connection, pass it in 
     as the `session` argument, and handle closing it when the router returns!
+
+    Optional `min_price` / `max_price` filters run inside the SQL query. Pass `limit` to get one page at a time;
+    the `X-Next-Cursor` response header then holds the `cursor` value for the next page.
     """
-    products = session.exec(select(Product)).all()
+    if min_price is None and max_price is None and limit is None and cursor is None:
+        catalog = await product_catalog.ensure_loaded()
+        return cached_json_response(request, catalog.json_blob, catalog.etag)
+
+    try:
+        # run_sync() runs our regular (sync) query helper on the async session's connection, without blocking the event loop
+        products, next_cursor = await session.run_sync(page_products, limit, cursor, product_filters(min_price, max_price))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return products
 
 @app.get("/products/{sku}")
-async def get_product_by_sku(sku: str, session: Session = Depends(get_session)):
+async def get_product_by_sku(sku: str, request: Request):
     """
-    Retrieve a specific product by its unique SKU.
+    Retrieve a specific product by its unique SKU (served from the in-memory catalog).
     """
-    product = session.exec(select(Product).where(Product.sku == sku)).first()
-    if not product:
+    product_json = await product_catalog.get(sku)
+    if product_json is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return cached_json_response(request, product_json, make_etag(product_json))
+
+# How many orders are loaded from the database and serialized together per streamed chunk
+ORDERS_CHUNK_SIZE = 500
+
+orders_page_adapter = TypeAdapter(List[OrderRead])
+
+def stream_orders_json(conditions: list):
+    """
+    Yields the JSON array of all matching orders piece by piece.
+
+    `selectinload(Order.items)` fetches the items for a whole chunk of orders in ONE extra query
+    (`... WHERE order_id IN (...)`), instead of one lazy query per order (the "N+1 problem").
+    `yield_per` makes SQLAlchemy hand us the rows in chunks, so only one chunk is ever in memory.
+    """
+    # This generator runs AFTER the route has returned, so it opens its own session
+    # rather than borrowing the request's (which FastAPI has already closed by then).
+    with Session(engine) as session:
+        statement = (
+            select(Order)
+            .where(*conditions)
+            .options(selectinload(Order.items))
+            .order_by(Order.id)
+            .execution_options(yield_per=ORDERS_CHUNK_SIZE)
+        )
+        yield b"["
+        first = True
+        for chunk in session.exec(statement).partitions():
+            # A streamed response is serialized here, long after the route returned, so it's timed here too
+            with timed("serialization"):
+                body = b",".join(OrderRead.model_validate(order).model_dump_json().encode() for order in chunk)
+            yield body if first else b"," + body
+            first = False
+        yield b"]"
 
 @app.get("/orders")
-async def get_orders(session: Session = Depends(get_session)):
+async def get_orders(
+    priority: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
+):
     """
-    Retrieve all orders from the database.
+    Retrieve all orders from the database, each with its nested line items.
     Useful for an admin dashboard to see all successfully processed sales.
+
+    All filters (`priority`, `created_after` / `created_before`, `min_price` / `max_price`) are applied in SQL.
+    Without `limit`, every matching order is streamed in chunks, so even 100k orders never sit in memory as
+    one giant list. With `limit`, one page is returned and the `X-Next-Cursor` header holds the next `cursor`.
     """
-    orders = session.exec(select(Order)).all()
-    
-    # Manually serialize orders to include their related nested items
-    result = []
-    for order in orders:
-        order_dict = order.model_dump()
-        order_dict["items"] = [item.model_dump() for item in order.items]
-        result.append(order_dict)
-        
-    return result
+    conditions = order_filters(priority, created_after, created_before, min_price, max_price)
+    if limit is None and cursor is None:
+        return StreamingResponse(stream_orders_json(conditions), media_type="application/json")
+
+    try:
+        orders, next_cursor = await session.run_sync(page_orders, limit or MAX_PAGE_SIZE, cursor, conditions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = orders_page_adapter.dump_json(orders_page_adapter.validate_python(orders, from_attributes=True))
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # Notice how we also define the type of the data we are returning using response_model!
 # This makes FastAPI validate the data WE send out, not just the data coming in.
@@ -122,30 +264,12 @@ def process_multiple_orders(orders: List[CustomerOrder], session: Session = Depe
     Process an array of multiple orders at once.
     FastAPI expects the JSON body payload to be a List (Array) containing valid CustomerOrder objects.
     """
-    # 1. Save valid orders to a database
-    for order_data in orders:
-        db_order = Order(
-            order_id=order_data.order_id,
-            customer_name=order_data.customer_name,
-            email=order_data.email,
-            price=order_data.price,
-            is_priority=order_data.is_priority
-        )
-        session.add(db_order)
-        session.commit()
-        session.refresh(db_order)
-        
-        for item in order_data.items:
-            db_item = OrderItem(
-                order_id=db_order.id, # Map back to the primary key of the new Order row
-                product_id=item.product_id,
-                item_name=item.item_name,
-                sku=item.sku,
-                quantity=item.quantity,
-                price=item.price,
-                image_url=item.image_url
-            )
-            session.add(db_item)
+    # 1. Save valid orders to a database.
+    # All orders and their items go in with two bulk INSERTs and ONE commit (a single transaction),
+    # instead of a commit + refresh per order. If anything fails, nothing from this batch is saved.
+    with timed("db_insert"):
+        bulk_insert_orders(session, orders)
+    with timed("commit"):
         session.commit()
     
     # Calculate metrics
@@ -161,14 +285,97 @@ def process_multiple_orders(orders: List[CustomerOrder], session: Session = Depe
     }
 
 
+@app.post("/process-orders/stream", response_model=OrderProcessSummary)
+async def process_orders_stream(request: Request, session: AsyncSession = Depends(get_async_session)):
+    """
+    The streaming version of /process-orders/ for big bulk uploads (same JSON array body, same summary back).
+
+    Orders are parsed from the body while it is still uploading, then validated and saved `INGEST_CHUNK_ORDERS`
+    at a time, each chunk in its own transaction. That way memory stays bounded, and a long upload never holds
+    SQLite's write lock for its whole duration. If an order is invalid, the chunks before it stay saved, and the
+    error says how many orders were saved and which one failed.
+    """
+    saved = 0
+    total_revenue = 0.0
+    priority_count = 0
+    chunk: List[CustomerOrder] = []
+
+    async def save_chunk():
+        nonlocal saved, total_revenue, priority_count
+        with timed("db_insert"):
+            await session.run_sync(bulk_insert_orders, chunk)
+        with timed("commit"):
+            await session.commit()
+        saved += len(chunk)
+        total_revenue += sum(order.price for order in chunk)
+        priority_count += sum(1 for order in chunk if order.is_priority)
+        chunk.clear()
+
+    try:
+        index = 0
+        # request.stream() hands us the body piece by piece as it arrives over the network
+        async for raw_order in iter_json_array(request.stream()):
+            with timed("validation"):
+                chunk.append(CustomerOrder.model_validate(raw_order))
+            index += 1
+            if len(chunk) >= INGEST_CHUNK_ORDERS:
+                await save_chunk()
+        if chunk:
+            await save_chunk()
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={"index": index, "saved_orders": saved, "errors": e.errors(include_url=False, include_context=False)},
+        )
+    except BodyTooLarge as e:
+        raise HTTPException(status_code=413, detail={"message": str(e), "saved_orders": saved})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "saved_orders": saved})
+
+    return {
+        "message": f"Successfully processed {saved} clean orders.",
+        "total_revenue": total_revenue,
+        "priority_orders": priority_count
+    }
+
+
 # Notice how we use `order: CustomerOrder`. This tells FastAPI to strictly enforce the schema!
 @app.post("/clean-order")
-async def clean_single_order(order: CustomerOrder, session: Session = Depends(get_session)):
+async def clean_single_order(
+    order: CustomerOrder,
+    response: Response,
+    ack: AckMode = "durable",
+    session: AsyncSession = Depends(get_async_session),
+):
     """
     Process a single manual checkout order from the React frontend cart.
+
+    With the write-behind queue enabled (`FAST_DANTIC_WRITE_BEHIND=1`), the order is queued and saved together
+    with other checkouts in one group commit. `ack=durable` (the default) waits until it is committed;
+    `ack=accepted` answers `202 Accepted` as soon as it is queued. A full queue answers `503` with `Retry-After`.
     """
     # If the code execution reaches this line, FastAPI has ALREADY validated the data!
     # It automatically coerced strings to ints/floats, checked email formats, etc.
+
+    if order_write_queue.running:
+        try:
+            pending = await order_write_queue.submit(order)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        if ack == "accepted":
+            response.status_code = 202
+            return {
+                "status": "accepted",
+                "message": f"Order {order.order_id} for {order.customer_name} is perfectly structured and queued for saving.",
+                "clean_data": order
+            }
+        with timed("queue_wait"):
+            await pending.saved
+        return {
+            "status": "success",
+            "message": f"Order {order.order_id} for {order.customer_name} is perfectly structured and saved to the database.",
+            "clean_data": order
+        }
     
     # Save the order parent to our database
     db_order = Order(
@@ -178,23 +385,30 @@ async def clean_single_order(order: CustomerOrder, session: Session = Depends(ge
         price=order.price,
         is_priority=order.is_priority
     )
-    session.add(db_order)
-    session.commit()
-    session.refresh(db_order) # Reload the object to grab its new auto-generated ID from SQLite
-    
-    # Save child line-items linking to the parent order
-    for item in order.items:
-        db_item = OrderItem(
-            order_id=db_order.id,
-            product_id=item.product_id,
-            item_name=item.item_name,
-            sku=item.sku,
-            quantity=item.quantity,
-            price=item.price,
-            image_url=item.image_url
-        )
-        session.add(db_item)
-    session.commit()
+    # `timed(...)` records how long each stage takes, for the /metrics endpoint
+    with timed("db_insert"):
+        session.add(db_order)
+        # `await` hands control back to the event loop while SQLite works, so other requests keep being served.
+        # flush() sends the INSERT (and fills in db_order.id) without ending the transaction yet.
+        await session.flush()
+
+        # Save child line-items linking to the parent order
+        for item in order.items:
+            db_item = OrderItem(
+                order_id=db_order.id,
+                product_id=item.product_id,
+                item_name=item.item_name,
+                sku=item.sku,
+                quantity=item.quantity,
+                price=item.price,
+                image_url=item.image_url
+            )
+            session.add(db_item)
+        await session.flush()
+
+    # One commit for the order and its items: they are saved together or not at all
+    with timed("commit"):
+        await session.commit()
     
     return {
         "status": "success",
@@ -206,24 +420,32 @@ async def clean_single_order(order: CustomerOrder, session: Session = Depends(ge
 # ==========================================
 # Pydantic AI Integration
 # ==========================================
-# Build a dynamic string of our product catalog for the AI so it knows current prices
-catalog_prompt = "\n".join([f"- {p['item_name']} (SKU: {p['sku']}): ${p['price']} each" for p in fake_products_db])
+# 'openai:gpt-4o' is the default model. Point FAST_DANTIC_LLM_MODEL at any other Pydantic AI model name
+# (e.g. a local 'ollama:llama3.2') to run the AI features without OpenAI.
+LLM_MODEL = os.environ.get("FAST_DANTIC_LLM_MODEL", "openai:gpt-4o")
+
+# The system prompts are built on every run from `catalog_prompt`, so the agents always see today's prices.
+# The (shared, rarely changing) catalog block comes FIRST and the agent's own instructions after it,
+# which keeps the start of every prompt identical and lets the LLM provider's prompt cache reuse it.
+ORDER_INSTRUCTIONS = (
+    "You are an order extraction assistant. Extract the customer's order details from the provided text into the structured format required.\n\n"
+    "IMPORTANT PRICING RULES:\n"
+    "You MUST calculate the `price` field strictly using the PRODUCT CATALOG above for all items ordered.\n\n"
+    "If the customer doesn't specify an ID, name, or email, use a random integer order_id, 'Guest User' for customer_name, and 'guest@example.com' for email."
+)
+
+async def order_system_prompt() -> str:
+    return (await catalog_prompt.current()).text + ORDER_INSTRUCTIONS
 
 # Initialize the Pydantic AI Agent.
-# 'openai:gpt-4o' is the default model.
 # By setting `output_type=CustomerOrder`, the agent is restricted to ONLY return perfectly formatted JSON
 # matching that exact Pydantic schema.
 order_agent = Agent(
-    'openai:gpt-4o',
-    output_type=CustomerOrder,
-    system_prompt=(
-        "You are an order extraction assistant. Extract the customer's order details from the provided text into the structured format required.\n\n"
-        "IMPORTANT PRICING RULES:\n"
-        "You MUST calculate the `price` field strictly using the following product catalog for all items ordered:\n"
-        f"{catalog_prompt}\n\n"
-        "If the customer doesn't specify an ID, name, or email, use a random integer order_id, 'Guest User' for customer_name, and 'guest@example.com' for email."
-    )
+    LLM_MODEL,
+    output_type=CustomerOrder
 )
+# Registering a function (instead of a fixed string) makes the agent call it at the start of every run
+order_agent.system_prompt(order_system_prompt)
 
 @app.post("/extract-order", response_model=CustomerOrder)
 async def extract_order(order_text: str = Body(..., embed=True)):
@@ -231,30 +453,90 @@ async def extract_order(order_text: str = Body(..., embed=True)):
     Uses Pydantic AI to turn natural language ("I'll take 3 routers") into a structured CustomerOrder JSON.
     The frontend calls this magic box, gets the JSON back, and immediately posts it to /clean-order.
     """
-    # Run the agent asynchronously to pass the raw text to the LLM
-    result = await order_agent.run(order_text)
+    # Run the agent asynchronously to pass the raw text to the LLM.
+    # `run_cached` answers repeated texts from the LLM response cache, and makes identical
+    # requests that arrive at the same time share a single LLM call.
+    output = await run_cached(order_agent, await order_system_prompt(), order_text)
     
     # Return the perfectly structured data from the agent run!
-    return result.output
+    return output
+
+async def stream_extractions(batch: BatchExtractionRequest):
+    """
+    Runs `order_agent` over every text and yields one NDJSON line per text as soon as it is done.
+
+    At most `batch.concurrency` LLM calls run at once. Each text gets `batch.timeout_s` seconds; a slow or
+    failing text becomes a "timeout"/"error" line while the other workers keep going, so one stuck LLM call
+    never holds up the rest of the batch.
+    (A timed-out call is cancelled and gives its slot straight back, unless another request is waiting on
+    the same shared call in the LLM response cache; then that call finishes outside the batch's slots.)
+    """
+    results: asyncio.Queue = asyncio.Queue()
+    texts = iter(enumerate(batch.order_texts))
+    slots = asyncio.Semaphore(batch.concurrency)
+
+    async def extract_one(index: int, text: str) -> ExtractionResult:
+        async with slots:
+            call = run_cached(order_agent, await order_system_prompt(), text, cancel_if_abandoned=True)
+            try:
+                # On timeout, wait_for() cancels the call, so it can't keep holding the slot
+                order = await asyncio.wait_for(call, batch.timeout_s)
+            except asyncio.TimeoutError:
+                return ExtractionResult(index=index, status="timeout", error=f"No answer within {batch.timeout_s}s")
+            except Exception as e:
+                logfire.exception("Batch extraction failed for text {index}", index=index)
+                return ExtractionResult(index=index, status="error", error=str(e))
+        return ExtractionResult(index=index, status="ok", order=order)
+
+    async def worker():
+        # All workers pull from the same iterator, so every text is handled exactly once
+        for index, text in texts:
+            await results.put(await extract_one(index, text))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(batch.concurrency, len(batch.order_texts)))]
+    try:
+        for _ in batch.order_texts:
+            result = await results.get()
+            with timed("serialization"):
+                line = result.model_dump_json(exclude_none=True).encode() + b"\n"
+            yield line
+    finally:
+        # If the client disconnects mid-batch, cancel the LLM calls in flight and don't start new ones
+        for task in workers:
+            task.cancel()
+
+@app.post("/extract-orders/batch")
+async def extract_orders_batch(batch: BatchExtractionRequest):
+    """
+    Extracts many free-text orders (e.g. from an email inbox) in one request.
+
+    The response is NDJSON (one JSON object per line), streamed as each text finishes, in completion order:
+    `{"index": 3, "status": "ok", "order": {...}}` or `{"index": 7, "status": "timeout", "error": "..."}`.
+    """
+    return StreamingResponse(stream_extractions(batch), media_type="application/x-ndjson")
 
 # ==========================================
 # Solutions Architect Feature
 # ==========================================
 
+SOLUTION_INSTRUCTIONS = (
+    "You are an expert Enterprise Solutions Architect for 'FastDantic', a company that sells B2B Enterprise AI Agents.\n\n"
+    "The user will describe a business problem they are facing.\n"
+    "You must analyze their problem and recommend a tailored suite of AI agents from our catalog that perfectly solves their needs.\n\n"
+    "CATALOG PRICING RULES:\n"
+    "You MUST calculate the `total_estimated_cost` field strictly using the prices from the PRODUCT CATALOG above for the agents you recommend.\n\n"
+    "Keep your `reason` pitches short, punchy, and highly relevant to the user's specific problem."
+)
+
+async def solution_system_prompt() -> str:
+    return (await catalog_prompt.current()).text + SOLUTION_INSTRUCTIONS
+
 # Initialize a second Pydantic AI Agent designed to act as a sales engineer.
 solution_agent = Agent(
-    'openai:gpt-4o',
-    output_type=SolutionProposal,
-    system_prompt=(
-        "You are an expert Enterprise Solutions Architect for 'FastDantic', a company that sells B2B Enterprise AI Agents.\n\n"
-        "The user will describe a business problem they are facing.\n"
-        "You must analyze their problem and recommend a tailored suite of AI agents from our catalog that perfectly solves their needs.\n\n"
-        "CATALOG PRICING RULES:\n"
-        "You MUST calculate the `total_estimated_cost` field strictly using the prices from the following catalog for the agents you recommend:\n"
-        f"{catalog_prompt}\n\n"
-        "Keep your `reason` pitches short, punchy, and highly relevant to the user's specific problem."
-    )
+    LLM_MODEL,
+    output_type=SolutionProposal
 )
+solution_agent.system_prompt(solution_system_prompt)
 
 @app.post("/recommend-solutions", response_model=SolutionProposal)
 async def recommend_solutions(problem_description: str = Body(..., embed=True)):
@@ -264,3 +546,77 @@ async def recommend_solutions(problem_description: str = Body(..., embed=True)):
     """
     result = await solution_agent.run(problem_description)
     return result.output
+
+
+def sse_event(event: str, data: Union[BaseModel, dict]) -> bytes:
+    """Formats one Server-Sent Event: an `event:` name line, a `data:` JSON line, and a blank line to end it."""
+    with timed("serialization"):
+        payload = data.model_dump_json() if isinstance(data, BaseModel) else json.dumps(data)
+        return f"event: {event}\ndata: {payload}\n\n".encode()
+
+async def stream_solution_events(problem_description: str):
+    """
+    Streams a SolutionProposal as Server-Sent Events while the LLM is still writing it.
+
+    `run_stream` + `stream_output()` hand us the proposal re-validated after every few tokens. It is streamed as a
+    `SolutionProposalDraft` (a TypedDict that may be missing keys), because a half-written SolutionProposal
+    would fail validation. Once entry N+1 of `recommended_agents` shows up, entry N is finished, so we send it right away:
+
+        event: summary   -> {"summary": "..."}          (once the agent list starts)
+        event: agent     -> one RecommendedProduct      (as each one is complete)
+        event: proposal  -> the full, validated SolutionProposal (at the very end)
+        event: error     -> {"detail": "..."}           (if the run fails)
+    """
+    summary_sent = False
+    agents_sent = 0
+    # Only the awaits on the model count as `llm_call`: while we are suspended at a `yield`, the client
+    # is reading (and `sse_event` records its own serialization time)
+    llm_call = stage_timer("llm_call")
+    try:
+        async with AsyncExitStack() as stack:
+            with llm_call:
+                result = await stack.enter_async_context(
+                    solution_agent.run_stream(problem_description, output_type=SolutionProposalDraft)
+                )
+            drafts = aiter(result.stream_output(debounce_by=0.01))
+            while True:
+                with llm_call:
+                    draft = await anext(drafts, None)
+                if draft is None:
+                    break
+                agents = draft.get("recommended_agents", [])
+                if agents and not summary_sent:
+                    yield sse_event("summary", {"summary": draft.get("summary", "")})
+                    summary_sent = True
+                # The last entry may still be growing, so only send the ones before it
+                while agents_sent < len(agents) - 1:
+                    yield sse_event("agent", RecommendedProduct.model_validate(agents[agents_sent]))
+                    agents_sent += 1
+            with llm_call:
+                output = await result.get_output()
+            proposal = SolutionProposal.model_validate(output)
+    except Exception as e:
+        logfire.exception("Streaming solution proposal failed")
+        yield sse_event("error", {"detail": str(e)})
+        return
+    finally:
+        llm_call.record()
+
+    if not summary_sent:
+        yield sse_event("summary", {"summary": proposal.summary})
+    for agent in proposal.recommended_agents[agents_sent:]:
+        yield sse_event("agent", agent)
+    yield sse_event("proposal", proposal)
+
+@app.post("/recommend-solutions/stream")
+async def recommend_solutions_stream(problem_description: str = Body(..., embed=True)):
+    """
+    The streaming twin of /recommend-solutions: the frontend can show each recommended agent as soon as
+    the LLM has written it, instead of a spinner for the whole generation time.
+    """
+    return StreamingResponse(
+        stream_solution_events(problem_description),
+        media_type="text/event-stream",
+        # Don't let browsers or proxies (e.g. nginx) hold events back in a buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,226 @@
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+# ==========================================
+# Per-Stage Latency Metrics (Prometheus)
+# ==========================================
+# Logfire shows one span per request, but not WHERE inside the request the time goes.
+# This module times every stage of a request separately and keeps a histogram per (route, stage):
+#
+#   body_parse     reading the request body and decoding its JSON
+#   validation     FastAPI checking the body against our Pydantic schema (plus setting up dependencies)
+#   db_insert      the INSERT statements
+#   commit         waiting for SQLite to make the transaction permanent
+#   llm_call       waiting for the LLM
+#   serialization  turning the return value into the JSON response
+#
+# `GET /metrics` exports everything in the Prometheus text format, so Prometheus/Grafana can scrape it.
+# A measurement is two `perf_counter()` calls and one bucket increment (a couple of microseconds), which is
+# cheap enough to leave on in production. Set FAST_DANTIC_METRICS=0 to switch it off entirely.
+
+METRICS_ENABLED = os.environ.get("FAST_DANTIC_METRICS", "1") != "0"
+
+# Histogram bucket upper bounds, in seconds (from 0.5 ms up to a minute, for slow LLM calls)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self):
+        # One counter per bucket plus a final "+Inf" bucket; Prometheus wants them cumulative, which render() does
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class StageMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+
+    def observe(self, route: str, stage: str, seconds: float):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            histogram = self._histograms.get((route, stage))
+            if histogram is None:
+                histogram = self._histograms[(route, stage)] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """The Prometheus text exposition format."""
+        lines = [
+            "# HELP fast_dantic_stage_seconds Time spent in each stage of a request.",
+            "# TYPE fast_dantic_stage_seconds histogram",
+        ]
+        with self._lock:
+            snapshot = [(key, list(h.counts), h.sum, h.count) for key, h in sorted(self._histograms.items())]
+        for (route, stage), counts, total, count in snapshot:
+            labels = f'route="{route}",stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip((*BUCKETS, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f'fast_dantic_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"fast_dantic_stage_seconds_sum{{{labels}}} {total}")
+            lines.append(f"fast_dantic_stage_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics()
+
+
+class RequestTiming:
+    """Timestamps of one request, shared between the route wrapper and the endpoint wrapper."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+
+
+# The timing of the request being handled right now. Every request runs in its own asyncio task with its
+# own copy of the context, so the value never leaks between requests (and streaming bodies, which run after
+# the endpoint returned, still see it).
+_current_request: ContextVar[Optional[RequestTiming]] = ContextVar("current_request", default=None)
+
+
+class timed:
+    """`with timed("commit"):` records how long the block took, under the current request's route."""
+
+    # A plain class instead of @contextmanager: it skips the generator machinery, which is most of the overhead
+    __slots__ = ("stage", "route", "start")
+
+    def __init__(self, stage: str, route: Optional[str] = None):
+        self.stage = stage
+        self.route = route
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stage_metrics.observe(_route(self.route), self.stage, time.perf_counter() - self.start)
+
+
+class stage_timer:
+    """
+    Like `timed`, for a stage split over several blocks with other work in between (e.g. the awaits on a
+    model stream, with our own yields between them). Each `with timer:` adds to the total, and
+    `timer.record()` files the total as ONE sample.
+    """
+
+    __slots__ = ("stage", "route", "start", "total")
+
+    def __init__(self, stage: str, route: Optional[str] = None):
+        self.stage = stage
+        self.route = route
+        self.total = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.total += time.perf_counter() - self.start
+
+    def record(self):
+        stage_metrics.observe(_route(self.route), self.stage, self.total)
+
+
+def _route(route: Optional[str]) -> str:
+    if route is None:
+        timing = _current_request.get()
+        route = timing.route if timing else "background"
+    return route
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    # functools.wraps keeps the original signature visible, so FastAPI still sees the same parameters
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            timing = _current_request.get()
+            if timing:
+                timing.endpoint_started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                if timing:
+                    timing.endpoint_finished = time.perf_counter()
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        # Sync endpoints run in a worker thread, but with a copy of our context, so `timing` is the same object
+        timing = _current_request.get()
+        if timing:
+            timing.endpoint_started = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            if timing:
+                timing.endpoint_finished = time.perf_counter()
+    return sync_wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    An APIRoute that records body_parse, validation and serialization for every request.
+
+    FastAPI reads + validates the body, calls our endpoint, then serializes its return value, all inside one
+    handler. We read the body ourselves first (Starlette caches it, so FastAPI reuses it), and wrap the endpoint
+    to know when it starts and ends. Everything before it is validation, everything after it serialization
+    (except for streaming responses, whose body generators time their own serialization with `timed`).
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if METRICS_ENABLED:
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not METRICS_ENABLED:
+            return handler
+        route = self.path
+        # Routes that read the body themselves (like the streaming ingest) must not have it read for them
+        reads_body = self.body_field is not None
+
+        async def timed_handler(request: Request):
+            timing = RequestTiming(route)
+            _current_request.set(timing)
+
+            start = time.perf_counter()
+            if reads_body and request.headers.get("content-type", "").startswith("application/json") and await request.body():
+                try:
+                    await request.json()
+                except ValueError:
+                    pass  # FastAPI will parse it again and answer with its usual 422 error
+            parsed = time.perf_counter()
+            stage_metrics.observe(route, "body_parse", parsed - start)
+
+            response = await handler(request)
+
+            if timing.endpoint_started is not None:
+                stage_metrics.observe(route, "validation", timing.endpoint_started - parsed)
+                # A StreamingResponse's body is only produced after we return, so the time after the endpoint
+                # would just be building the response object: its generator records `serialization` itself
+                if not isinstance(response, StreamingResponse):
+                    stage_metrics.observe(route, "serialization", time.perf_counter() - timing.endpoint_finished)
+            return response
+
+        return timed_handler
@@ -1,6 +1,11 @@
+from datetime import datetime, timezone
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
 
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 # ==========================================
 # SQLModel Database Tables
 # ==========================================
@@ -31,6 +36,11 @@ class Order(SQLModel, table=True):
     email: str
     price: float
     is_priority: bool = Field(default=False)
+
+    # When the order was saved. `default_factory` fills it in for `Order(...)` objects, and the
+    # `sa_column_kwargs` default does the same for bulk INSERTs that skip the model class entirely.
+    # index=True lets the /orders date-range filter jump straight to the matching rows.
+    created_at: Optional[datetime] = Field(default_factory=utcnow, index=True, sa_column_kwargs={"default": utcnow})
     
     # Relationships 🤝:
     # A single order can have multiple items. `back_populates` links this list to the 
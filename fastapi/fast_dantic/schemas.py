@@ -1,5 +1,7 @@
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing_extensions import TypedDict
 
 # ==========================================
 # Pydantic Schemas (Data Validation)
@@ -57,6 +59,51 @@ class OrderProcessSummary(BaseModel):
     total_revenue: float
     priority_orders: int
 
+# Read schemas for sending saved orders back out (e.g. GET /orders).
+# `from_attributes=True` lets Pydantic read straight from the SQLModel database objects
+# (order.items, item.sku, ...) instead of requiring a dictionary.
+class OrderItemRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    order_id: int
+    product_id: Optional[int] = None
+    item_name: str
+    sku: str
+    quantity: int
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+
+
+class OrderRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    order_id: int
+    customer_name: str
+    email: str
+    price: float
+    is_priority: bool
+    created_at: Optional[datetime] = None
+    items: List[OrderItemRead]
+
+# ==========================================
+# Batch Order Extraction Schemas
+# ==========================================
+class BatchExtractionRequest(BaseModel):
+    order_texts: List[str] = Field(min_length=1, max_length=10_000)
+    # How many LLM calls may run at the same time, and how long one text may take before we give up on it
+    concurrency: int = Field(default=8, ge=1, le=64)
+    timeout_s: float = Field(default=60, gt=0, le=600)
+
+
+class ExtractionResult(BaseModel):
+    # Results are streamed as they finish (not in request order), so `index` says which text this was
+    index: int
+    status: Literal["ok", "error", "timeout"]
+    order: Optional[CustomerOrder] = None
+    error: Optional[str] = None
+
 # ==========================================
 # Solutions Architect Schemas
 # ==========================================
@@ -70,3 +117,18 @@ class SolutionProposal(BaseModel):
     summary: str = Field(description="An executive summary of the user's problem and how this suite of AI agents will solve it.")
     recommended_agents: List[RecommendedProduct]
     total_estimated_cost: float = Field(description="The sum of the prices of all recommended agents.")
+
+# Streaming "draft" versions of the two schemas above, for /recommend-solutions/stream.
+# While the LLM is still typing, the JSON is incomplete: `total_estimated_cost` doesn't exist yet, and the last
+# agent is half-written. Pydantic can only partially validate TypedDicts, where missing keys are allowed
+# (`total=False`), so the stream uses these, and the finished draft is validated into a real SolutionProposal.
+class RecommendedProductDraft(TypedDict):
+    item_name: str
+    sku: str
+    price: float
+    reason: Annotated[str, Field(description="A short, compelling 1-2 sentence sales pitch on why this specific agent solves the user's problem.")]
+
+class SolutionProposalDraft(TypedDict, total=False):
+    summary: Annotated[str, Field(description="An executive summary of the user's problem and how this suite of AI agents will solve it.")]
+    recommended_agents: List[RecommendedProductDraft]
+    total_estimated_cost: Annotated[float, Field(description="The sum of the prices of all recommended agents.")]
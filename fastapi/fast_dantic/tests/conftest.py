@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# The app modules import each other by plain name (`from database import ...`), like `fastapi dev main.py` runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py turns "database.db" into an absolute path when the engine is created at import time,
+# so move to a temp folder before any test imports it, to leave the real database untouched
+os.chdir(tempfile.mkdtemp(prefix="fast_dantic_tests_"))
+
+os.environ.setdefault("OPENAI_API_KEY", "not-needed-no-model-is-called")
+os.environ.setdefault("LOGFIRE_SEND_TO_LOGFIRE", "false")
+os.environ.setdefault("LOGFIRE_CONSOLE", "false")
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+
+import pytest
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+import main
+from llm_cache import llm_response_cache
+from schemas import BatchExtractionRequest
+
+ORDER = {
+    "order_id": 1,
+    "customer_name": "Grace Hopper",
+    "email": "grace@example.com",
+    "price": 1.0,
+    "items": [{"item_name": "Router", "sku": "CS-001", "quantity": 1}],
+}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Answers after 5 s for texts containing "slow", at once otherwise; records the calls still running."""
+    running: set[str] = set()
+
+    async def respond(messages, info):
+        text = messages[-1].parts[-1].content
+        running.add(text)
+        try:
+            await asyncio.sleep(5 if "slow" in text else 0.01)
+        finally:
+            running.discard(text)
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, ORDER)])
+
+    monkeypatch.setattr(main.order_agent, "model", FunctionModel(respond))
+    llm_response_cache.clear()
+    main.create_db_and_tables()
+    return running
+
+
+async def collect(batch: BatchExtractionRequest) -> list[dict]:
+    await main.product_catalog.load()
+    return [json.loads(line) async for line in main.stream_extractions(batch)]
+
+
+def test_slow_text_times_out_without_holding_up_the_batch(fake_llm):
+    # With one slot, the fast texts can only run once the slow call has given its slot back
+    batch = BatchExtractionRequest(order_texts=["slow one", "fast two", "fast three"], concurrency=1, timeout_s=0.3)
+
+    start = time.perf_counter()
+    results = asyncio.run(collect(batch))
+    elapsed = time.perf_counter() - start
+
+    assert {r["index"]: r["status"] for r in results} == {0: "timeout", 1: "ok", 2: "ok"}
+    assert elapsed < 1.5
+    assert not fake_llm  # the timed-out call was cancelled, not left running
+
+
+def test_timeout_keeps_a_call_other_requests_are_waiting_on(fake_llm):
+    async def run():
+        await main.product_catalog.load()
+        # A plain /extract-order request for the same text shares the batch's LLM call
+        shared = asyncio.ensure_future(main.extract_order("slow one"))
+        batch = BatchExtractionRequest(order_texts=["slow one"], timeout_s=0.3)
+        results = [json.loads(line) async for line in main.stream_extractions(batch)]
+        assert results[0]["status"] == "timeout"
+        assert fake_llm == {"slow one"}
+        shared.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from json_array import JSONArrayParser
+
+
+def parse(text: str, piece: int = 1) -> list:
+    """Feeds `text` a few characters at a time, like a slow upload."""
+    parser = JSONArrayParser()
+    values = []
+    for start in range(0, len(text), piece):
+        parser.feed(text[start:start + piece])
+        values.extend(parser.values())
+    parser.close()
+    values.extend(parser.values())
+    return values
+
+
+@pytest.mark.parametrize("piece", [1, 2, 7, 4096])
+def test_elements_split_across_pieces(piece):
+    text = '[{"a": [1, 2.5e-3, true, null], "s": "x\\u00e9\\"y"}, -12.5E+10, "s", [], 0]'
+    assert parse(text, piece) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ["[1 2]", "[,1]", "[1,]", "[1,,2]"])
+def test_rejects_bad_commas(text):
+    with pytest.raises(ValueError):
+        parse(text)
+
+
+def test_bad_element_fails_before_the_end():
+    parser = JSONArrayParser()
+    parser.feed('[{"a": 1}, {"a": x}, ' + '{"a": 1}, ' * 1000)
+    with pytest.raises(ValueError, match="at character 17"):
+        list(parser.values())
+
+
+def test_element_size_cap():
+    parser = JSONArrayParser(max_element_chars=100)
+    parser.feed('[1, "' + "a" * 50)
+    assert list(parser.values()) == [1]
+    parser.feed("a" * 100)
+    with pytest.raises(ValueError, match="longer than 100 characters"):
+        list(parser.values())
@@ -0,0 +1,154 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import Literal, Optional
+
+import logfire
+from pydantic import BaseModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from crud import bulk_insert_orders
+from database import async_engine
+from metrics import timed
+from schemas import CustomerOrder
+
+# ==========================================
+# Write-Behind Order Queue (Group Commit)
+# ==========================================
+# Every commit makes SQLite wait for the disk. When 200 shoppers check out in the same second,
+# writing each order in its own transaction means 200 waits, one after the other.
+# With the write-behind queue, `/clean-order` only validates the order and drops it in a queue.
+# A single background task picks up whatever has piled up (up to `max_batch` orders, or whatever
+# arrived within `flush_interval_ms`) and saves the whole group with ONE bulk insert and ONE commit.
+#
+# Clients choose how long they wait (the "acknowledgement" mode):
+#   * "durable"  -> the response is sent once the order's group has been committed (nothing is lost on a crash)
+#   * "accepted" -> the response is sent as soon as the order is queued (fastest, but a crash can lose it)
+#
+# The queue is bounded: when it is full, new checkouts wait up to `enqueue_timeout_s` for room and are
+# then turned away (the route answers `503 Service Unavailable`), instead of piling up in memory forever.
+
+AckMode = Literal["durable", "accepted"]
+
+
+class WriteQueueSettings(BaseModel):
+    enabled: bool = False
+    max_batch: int = 200
+    flush_interval_ms: int = 10
+    max_pending: int = 2_000
+    enqueue_timeout_s: float = 1.0
+
+
+# Turn the queue on with FAST_DANTIC_WRITE_BEHIND=1 (off by default: /clean-order then writes directly)
+write_queue_settings = WriteQueueSettings(enabled=os.environ.get("FAST_DANTIC_WRITE_BEHIND", "0") == "1")
+
+
+class QueueFull(Exception):
+    """Raised when an order could not be queued in time because the writer is too far behind."""
+
+
+@dataclass
+class PendingOrder:
+    order: CustomerOrder
+    # Resolved with the new `Order.id` once the order's group is committed (or with the error if it failed)
+    saved: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class OrderWriteQueue:
+    def __init__(self, settings: WriteQueueSettings):
+        self.settings = settings
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    def start(self):
+        # Created here (not in __init__) so the queue belongs to the server's running event loop
+        self._queue = asyncio.Queue(maxsize=self.settings.max_pending)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Writes out everything still queued, then stops the background task."""
+        if not self.running:
+            return
+        await self._queue.put(None)  # `None` tells the worker to finish up
+        await self._worker
+        self._worker = None
+
+    async def submit(self, order: CustomerOrder) -> PendingOrder:
+        """Queues an order. `await pending.saved` to wait until it is committed."""
+        pending = PendingOrder(order)
+        try:
+            await asyncio.wait_for(self._queue.put(pending), self.settings.enqueue_timeout_s)
+        except asyncio.TimeoutError:
+            raise QueueFull(f"More than {self.settings.max_pending} orders are waiting to be saved")
+        # "accepted" callers never await the result; failures are already logged in `_write`, so mark them as seen
+        pending.saved.add_done_callback(lambda saved: saved.cancelled() or saved.exception())
+        return pending
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+
+            # Keep collecting until the group is full or the flush interval is over
+            deadline = loop.time() + self.settings.flush_interval_ms / 1000
+            while len(batch) < self.settings.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+
+            await self._write(batch)
+
+    async def _write(self, batch: list[PendingOrder]):
+        try:
+            order_ids = await self._commit([pending.order for pending in batch])
+        except Exception:
+            # One bad order shouldn't sink everybody else's checkout: retry them one by one
+            # so only the order(s) that really fail get the error.
+            for pending in batch:
+                try:
+                    (order_id,) = await self._commit([pending.order])
+                except Exception as e:
+                    logfire.exception("Queued order {order_id} could not be saved", order_id=pending.order.order_id)
+                    self._resolve(pending, error=e)
+                else:
+                    self._resolve(pending, order_id)
+            return
+        for pending, order_id in zip(batch, order_ids):
+            self._resolve(pending, order_id)
+
+    async def _commit(self, orders: list[CustomerOrder]) -> list[int]:
+        async with AsyncSession(async_engine) as session:
+            with timed("db_insert", route="write_queue"):
+                order_ids = await session.run_sync(bulk_insert_orders, orders)
+            with timed("commit", route="write_queue"):
+                await session.commit()
+        return order_ids
+
+    @staticmethod
+    def _resolve(pending: PendingOrder, order_id: Optional[int] = None, error: Optional[Exception] = None):
+        # The client may have hung up (cancelling the future) while its order was being saved
+        if pending.saved.done():
+            return
+        if error is not None:
+            pending.saved.set_exception(error)
+        else:
+            pending.saved.set_result(order_id)
+
+
+order_write_queue = OrderWriteQueue(write_queue_settings)